@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Bumped when the layout of a version directory changes incompatibly
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+CURRENT_NAME = "CURRENT"
+
+
+def save_array(directory: str, name: str, array: np.ndarray) -> str:
+    """
+    Write one array as a standalone ``.npy`` file that can be memory-mapped
+    """
+    filename = f"{name}.npy"
+    np.save(os.path.join(directory, filename), np.ascontiguousarray(array), allow_pickle=False)
+    return filename
+
+
+def load_array(directory: str, name: str, mmap_mode: Optional[str] = 'r') -> np.ndarray:
+    """
+    Open an array written by ``save_array``, memory-mapped unless ``mmap_mode`` is None
+    """
+    return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+
+
+class ArtifactStore:
+    """
+    Versioned model artifacts kept side by side under one directory.
+
+    Each version is a directory holding a ``manifest.json`` and the arrays it
+    lists. A version is written under a temporary name and renamed into place
+    once complete. The ``CURRENT`` file, which names the version to serve, is
+    replaced atomically afterwards, so readers see either the old version or
+    the new one, never a partial write. Old versions are pruned. Processes
+    that still map a pruned version's files keep their pages until they
+    switch over.
+    """
+
+    def __init__(self, root: str, keep_versions: int = 3):
+        self.root = root
+        self.keep_versions = keep_versions
+
+    def current_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, CURRENT_NAME)) as pointer:
+                return pointer.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def open(self, version: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Return the directory and manifest of a version, the current one by default
+        """
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"No artifact has been published to {self.root}")
+        path = os.path.join(self.root, version)
+        with open(os.path.join(path, MANIFEST_NAME)) as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact format {manifest.get('format_version')} in {path}")
+        return path, manifest
+
+    def publish(self, write: Callable[[str], Dict[str, Any]], metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Write a new version and make it current
+
+        ``write`` fills the given directory and returns the manifest entries
+        describing what it wrote.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        created_at = datetime.now(timezone.utc)
+        version = f"v{created_at.strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+        staging = os.path.join(self.root, f".{version}.tmp")
+        os.makedirs(staging)
+        try:
+            manifest = {
+                "format_version": ARTIFACT_FORMAT_VERSION,
+                "version": version,
+                "created_at": created_at.isoformat(),
+                **(metadata or {}),
+                **write(staging)
+            }
+            with open(os.path.join(staging, MANIFEST_NAME), "w") as manifest_file:
+                json.dump(manifest, manifest_file, indent=2)
+            os.rename(staging, os.path.join(self.root, version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        pointer = os.path.join(self.root, f".{CURRENT_NAME}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(pointer, "w") as pointer_file:
+            pointer_file.write(version)
+            pointer_file.flush()
+            os.fsync(pointer_file.fileno())
+        os.replace(pointer, os.path.join(self.root, CURRENT_NAME))
+
+        self.prune()
+        return version
+
+    def versions(self) -> List[str]:
+        """
+        Published versions, oldest first
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if not name.startswith(".") and os.path.isfile(os.path.join(self.root, name, MANIFEST_NAME))
+        )
+
+    def prune(self):
+        """
+        Delete all but the newest ``keep_versions`` versions, never the current one
+        """
+        current = self.current_version()
+        for version in self.versions()[:-self.keep_versions or None]:
+            if version != current:
+                shutil.rmtree(os.path.join(self.root, version), ignore_errors=True)
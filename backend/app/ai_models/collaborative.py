@@ -0,0 +1,162 @@
+import numpy as np
+import scipy.sparse as sp
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.ai_models.artifacts import load_array, save_array
+
+# Vendors whose similarity rows are computed per sparse product while fitting
+SIMILARITY_BLOCK_SIZE = 1024
+
+
+def _top_k_per_row(matrix: sp.csr_matrix, k: int) -> sp.csr_matrix:
+    """
+    Keep the ``k`` largest entries of every row
+    """
+    counts = np.diff(matrix.indptr)
+    if counts.max(initial=0) <= k:
+        return matrix
+    keep = np.ones(matrix.nnz, dtype=bool)
+    for row in np.flatnonzero(counts > k):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        drop = np.argpartition(-matrix.data[start:end], k)[k:]
+        keep[start + drop] = False
+    rows = np.repeat(np.arange(matrix.shape[0]), counts)[keep]
+    return sp.csr_matrix((matrix.data[keep], (rows, matrix.indices[keep])), shape=matrix.shape)
+
+
+class VendorCoOccurrence:
+    """
+    Item-item collaborative filtering over the buyer x vendor order matrix.
+
+    Interactions are order counts per (buyer, vendor) pair, dampened with
+    log1p. Two vendors are similar when the same buyers order from both:
+    the cosine of their buyer columns, kept for the ``neighbors`` most
+    similar vendors only. A buyer's score for a vendor is the sum, over the
+    vendors they already order from, of interaction weight times
+    similarity. Vendors they already order from are left out.
+
+    Both matrices are sparse. The similarity is computed a block of vendors
+    at a time and pruned per block. Memory therefore follows the number of
+    interactions plus vendors x ``neighbors``, never buyers x vendors or
+    vendors x vendors. ``save``/``load`` use the memory-mappable ``.npy``
+    layout of the other models.
+    """
+
+    def __init__(self, neighbors: int = 50):
+        self.neighbors = neighbors
+        self.is_fitted = False
+        self._interactions = sp.csr_matrix((0, 0))
+        self._similarity = sp.csr_matrix((0, 0))
+        self._buyer_ids = np.empty(0, dtype=np.int64)
+        self._vendor_ids = np.empty(0, dtype=np.int64)
+        self._buyers: Dict[int, int] = {}
+
+    def __contains__(self, buyer_id: int) -> bool:
+        return buyer_id in self._buyers
+
+    def fit(self, buyer_ids, vendor_ids, counts):
+        """
+        Build the model from parallel (buyer_id, vendor_id, order count) arrays
+        """
+        buyer_ids, buyer_rows = np.unique(np.asarray(buyer_ids, dtype=np.int64), return_inverse=True)
+        vendor_ids, vendor_columns = np.unique(np.asarray(vendor_ids, dtype=np.int64), return_inverse=True)
+        interactions = sp.csr_matrix(
+            (np.log1p(np.asarray(counts, dtype=np.float64)), (buyer_rows, vendor_columns)),
+            shape=(len(buyer_ids), len(vendor_ids))
+        )
+
+        # Unit-length vendor columns make R^T R the cosine between vendors
+        norms = np.sqrt(np.asarray(interactions.multiply(interactions).sum(axis=0))).ravel()
+        normalized = (interactions @ sp.diags(1.0 / np.maximum(norms, 1e-12))).tocsc()
+        normalized_rows = normalized.tocsr()
+        blocks = []
+        for start in range(0, len(vendor_ids), SIMILARITY_BLOCK_SIZE):
+            end = min(start + SIMILARITY_BLOCK_SIZE, len(vendor_ids))
+            block = (normalized[:, start:end].T @ normalized_rows).tocsr()
+            # A vendor is not its own neighbour
+            rows = np.repeat(np.arange(start, end), np.diff(block.indptr))
+            block.data[block.indices == rows] = 0
+            block.eliminate_zeros()
+            blocks.append(_top_k_per_row(block, self.neighbors))
+
+        self._interactions = interactions
+        self._similarity = sp.vstack(blocks, format='csr') if blocks else sp.csr_matrix((0, 0))
+        self._buyer_ids = buyer_ids
+        self._vendor_ids = vendor_ids
+        self._buyers = dict(zip(buyer_ids.tolist(), range(len(buyer_ids))))
+        self.is_fitted = True
+
+    def score_batch(self, buyer_ids: List[Optional[int]], top_n: int = 20) -> List[List[Tuple[int, float]]]:
+        """
+        Top ``top_n`` (vendor_id, score) pairs per buyer; unknown buyers get none
+
+        Scores are scaled so each buyer's best vendor scores 1.
+        """
+        rows = [self._buyers.get(buyer_id) for buyer_id in buyer_ids]
+        known = [row for row in rows if row is not None]
+        if not self.is_fitted or not known or top_n <= 0:
+            return [[] for _ in buyer_ids]
+
+        history = self._interactions[known]
+        scores = (history @ self._similarity).tocsr()
+        results = {}
+        for position, row in enumerate(known):
+            start, end = scores.indptr[position], scores.indptr[position + 1]
+            columns, values = scores.indices[start:end], scores.data[start:end]
+            # Leave out vendors the buyer already orders from
+            ordered = history.indices[history.indptr[position]:history.indptr[position + 1]]
+            fresh = ~np.isin(columns, ordered) & (values > 0)
+            columns, values = columns[fresh], values[fresh]
+            if len(values) > top_n:
+                top = np.argpartition(-values, top_n - 1)[:top_n]
+                columns, values = columns[top], values[top]
+            order = np.argsort(-values, kind='stable')
+            best = values[order[0]] if len(order) else 1.0
+            results[row] = [(int(self._vendor_ids[columns[i]]), float(values[i] / best)) for i in order]
+        return [results[row] if row is not None else [] for row in rows]
+
+    def save(self, directory: str) -> Dict[str, Any]:
+        """
+        Write the model to ``directory``; returns the manifest entries ``load`` needs
+        """
+        if not self.is_fitted:
+            raise ValueError("Cannot save a model that has not been fitted")
+        return {
+            "neighbors": self.neighbors,
+            "n_buyers": len(self._buyer_ids),
+            "n_vendors": len(self._vendor_ids),
+            "n_interactions": int(self._interactions.nnz),
+            "files": [
+                save_array(directory, "interactions_data", self._interactions.data),
+                save_array(directory, "interactions_indices", self._interactions.indices),
+                save_array(directory, "interactions_indptr", self._interactions.indptr),
+                save_array(directory, "similarity_data", self._similarity.data),
+                save_array(directory, "similarity_indices", self._similarity.indices),
+                save_array(directory, "similarity_indptr", self._similarity.indptr),
+                save_array(directory, "buyer_ids", self._buyer_ids),
+                save_array(directory, "vendor_ids", self._vendor_ids)
+            ]
+        }
+
+    @classmethod
+    def load(cls, directory: str, manifest: Dict[str, Any], mmap_mode: Optional[str] = 'r') -> "VendorCoOccurrence":
+        """
+        Open a model written by ``save``, memory-mapping its arrays
+        """
+        model = cls(neighbors=manifest["neighbors"])
+        n_buyers, n_vendors = manifest["n_buyers"], manifest["n_vendors"]
+
+        def matrix(name: str, shape: Tuple[int, int]) -> sp.csr_matrix:
+            return sp.csr_matrix(
+                tuple(load_array(directory, f"{name}_{part}", mmap_mode) for part in ("data", "indices", "indptr")),
+                shape=shape,
+                copy=False
+            )
+
+        model._interactions = matrix("interactions", (n_buyers, n_vendors))
+        model._similarity = matrix("similarity", (n_vendors, n_vendors))
+        model._buyer_ids = load_array(directory, "buyer_ids", mmap_mode)
+        model._vendor_ids = load_array(directory, "vendor_ids", mmap_mode)
+        model._buyers = dict(zip(model._buyer_ids.tolist(), range(n_buyers)))
+        model.is_fitted = True
+        return model
@@ -0,0 +1,244 @@
+import numpy as np
+import scipy.sparse as sp
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.ai_models.artifacts import load_array, save_array
+from app.ai_models.embeddings import HashedNgramEmbedder, load_embedder
+from app.ai_models.supplier_index import profile_text
+
+# Rows scored against the centroids at a time while clustering
+ASSIGN_BATCH_SIZE = 16384
+# Profiles embedded per call while fitting
+EMBED_BATCH_SIZE = 8192
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """
+    Index of the nearest (highest cosine) centroid for every row
+    """
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_BATCH_SIZE):
+        batch = vectors[start:start + ASSIGN_BATCH_SIZE]
+        assignment[start:start + len(batch)] = np.argmax(batch @ centroids.T, axis=1)
+    return assignment
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 10, sample_per_list: int = 64, seed: int = 42) -> np.ndarray:
+    """
+    Spherical k-means centroids, trained on a sample of the rows
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), n_lists * sample_per_list)
+    sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _assign(sample, centroids)
+        # Sum each cluster's rows with one sparse (clusters x rows) product
+        members = sp.csr_matrix(
+            (np.ones(sample_size, dtype=np.float32), (assignment, np.arange(sample_size))),
+            shape=(n_lists, sample_size)
+        )
+        sums = np.asarray(members @ sample)
+        empty = np.flatnonzero(np.bincount(assignment, minlength=n_lists) == 0)
+        # Empty clusters restart from random rows
+        sums[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+        centroids = _normalize(sums).astype(np.float32)
+    return centroids
+
+
+class EmbeddingIndex:
+    """
+    Dense supplier embeddings behind an inverted-file (IVF) ANN index.
+
+    Supplier embeddings are clustered with k-means into ``n_lists`` lists,
+    about sqrt(n) by default, and stored sorted by list, so each list is
+    one contiguous block of rows. A query scores the centroids first and
+    then only the rows of the ``nprobe`` closest lists. ``nprobe`` trades
+    recall for latency: 1 scans about 1/n_lists of the suppliers, and
+    ``n_lists`` makes the search exact.
+
+    Updates work as in ``SupplierIndex``: added or updated suppliers go to
+    a delta segment, removed ones are tombstoned, and ``compact`` folds both
+    into the lists. Centroids stay fixed until the next full ``fit``.
+    ``save``/``load`` use the same memory-mappable ``.npy`` layout.
+    """
+
+    def __init__(self, embedder=None, nprobe: int = 16, n_lists: Optional[int] = None, compact_threshold: int = 256):
+        self.embedder = embedder or HashedNgramEmbedder()
+        self.nprobe = nprobe
+        self.n_lists = n_lists
+        self.compact_threshold = compact_threshold
+        self.is_fitted = False
+        self._centroids = np.empty((0, 0), dtype=np.float32)
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._column_ids = np.empty(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._columns: Dict[int, int] = {}
+        self._delta: Dict[int, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._columns) + len(self._delta)
+
+    def __contains__(self, supplier_id: int) -> bool:
+        return supplier_id in self._columns or supplier_id in self._delta
+
+    def fit(self, supplier_ids: List[int], profiles: List[Dict[str, Any]]):
+        """
+        Embed every profile, cluster the embeddings and build the lists from scratch
+        """
+        vectors = np.concatenate([
+            self.embedder.embed([profile_text(p) for p in profiles[start:start + EMBED_BATCH_SIZE]])
+            for start in range(0, len(profiles), EMBED_BATCH_SIZE)
+        ])
+        n_lists = min(len(vectors), self.n_lists or max(1, int(round(np.sqrt(len(vectors))))))
+        self._centroids = _kmeans(vectors, n_lists)
+        self._build(np.asarray(supplier_ids, dtype=np.int64), vectors)
+        self.is_fitted = True
+
+    def upsert(self, supplier_id: int, profile: Dict[str, Any]):
+        """
+        Add or replace a single supplier without re-clustering
+        """
+        if not self.is_fitted:
+            return
+        self._tombstone(supplier_id)
+        self._delta[supplier_id] = self.embedder.embed([profile_text(profile)])[0]
+        if len(self._delta) >= self.compact_threshold:
+            self.compact()
+
+    def remove(self, supplier_id: int):
+        """
+        Remove a supplier from the index
+        """
+        self._tombstone(supplier_id)
+        self._delta.pop(supplier_id, None)
+
+    def compact(self):
+        """
+        Fold the delta segment into the lists and drop tombstones
+        """
+        live = np.flatnonzero(self._column_ids >= 0)
+        ids = [self._column_ids[live]]
+        blocks = [np.asarray(self._vectors[live])]
+        if self._delta:
+            ids.append(np.fromiter(self._delta.keys(), dtype=np.int64, count=len(self._delta)))
+            blocks.append(np.stack(list(self._delta.values())))
+        self._build(np.concatenate(ids), np.concatenate(blocks))
+
+    def search(self, profile: Dict[str, Any], top_n: int = 5, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Return the ``top_n`` (supplier_id, cosine similarity) pairs for a profile
+
+        ``nprobe`` overrides the number of lists scanned for this query.
+        """
+        return self.search_batch([profile], top_n=top_n, nprobe=nprobe)[0]
+
+    def search_batch(self, profiles: List[Dict[str, Any]], top_n: int = 5, nprobe: Optional[int] = None) -> List[List[Tuple[int, float]]]:
+        """
+        ``search`` for many profiles; the profiles are embedded in one call
+        """
+        if not self.is_fitted or top_n <= 0:
+            return [[] for _ in profiles]
+        queries = self.embedder.embed([profile_text(p) for p in profiles])
+        return [self._search_vector(query, top_n, nprobe) for query in queries]
+
+    def _search_vector(self, query: np.ndarray, top_n: int, nprobe: Optional[int]) -> List[Tuple[int, float]]:
+        if not query.any():
+            return []
+
+        n_lists = len(self._centroids)
+        nprobe = min(nprobe or self.nprobe, n_lists)
+        if nprobe < n_lists:
+            probe = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+            # Each list is a contiguous block, so a probe is one slice and matmul
+            blocks = [(self._offsets[i], self._offsets[i + 1]) for i in probe]
+            ids = np.concatenate([self._column_ids[start:end] for start, end in blocks])
+            values = np.concatenate([self._vectors[start:end] @ query for start, end in blocks])
+        else:
+            ids = np.asarray(self._column_ids)
+            values = self._vectors @ query
+
+        if self._delta:
+            ids = np.concatenate([ids, np.fromiter(self._delta.keys(), dtype=np.int64, count=len(self._delta))])
+            values = np.concatenate([values, np.stack(list(self._delta.values())) @ query])
+
+        # Tombstoned rows and unrelated suppliers are dropped
+        keep = (ids >= 0) & (values > 0)
+        ids, values = ids[keep], values[keep]
+
+        if len(values) > top_n:
+            top = np.argpartition(-values, top_n - 1)[:top_n]
+            ids, values = ids[top], values[top]
+        order = np.argsort(-values, kind='stable')
+
+        return [(int(ids[i]), float(values[i])) for i in order]
+
+    def save(self, directory: str) -> Dict[str, Any]:
+        """
+        Write the fitted index to ``directory``; returns the manifest entries ``load`` needs
+        """
+        if not self.is_fitted:
+            raise ValueError("Cannot save an index that has not been fitted")
+        # Saved indexes have no delta segment or tombstones
+        if self._delta or len(self._columns) < len(self._column_ids):
+            self.compact()
+
+        return {
+            "index_type": "embedding",
+            "embedder": self.embedder.config(),
+            "nprobe": self.nprobe,
+            "n_lists": len(self._centroids),
+            "compact_threshold": self.compact_threshold,
+            "n_suppliers": len(self._column_ids),
+            "files": [
+                save_array(directory, "centroids", self._centroids),
+                save_array(directory, "vectors", self._vectors),
+                save_array(directory, "list_offsets", self._offsets),
+                save_array(directory, "column_ids", self._column_ids)
+            ]
+        }
+
+    @classmethod
+    def load(cls, directory: str, manifest: Dict[str, Any], mmap_mode: Optional[str] = 'r',
+             nprobe: Optional[int] = None) -> "EmbeddingIndex":
+        """
+        Open an index written by ``save``, memory-mapping its arrays
+
+        ``nprobe`` replaces the default the index was saved with.
+        """
+        index = cls(
+            embedder=load_embedder(manifest["embedder"]),
+            nprobe=nprobe or manifest["nprobe"],
+            n_lists=manifest["n_lists"],
+            compact_threshold=manifest["compact_threshold"]
+        )
+        index._centroids = load_array(directory, "centroids", mmap_mode=None)
+        index._vectors = load_array(directory, "vectors", mmap_mode)
+        index._offsets = load_array(directory, "list_offsets", mmap_mode=None)
+        # Tombstones write to the supplier ids, so those are mapped copy-on-write
+        column_ids = load_array(directory, "column_ids", 'c' if mmap_mode else None)
+        index._column_ids = column_ids
+        index._columns = dict(zip(column_ids.tolist(), range(len(column_ids))))
+        index.is_fitted = True
+        return index
+
+    def _build(self, supplier_ids: np.ndarray, vectors: np.ndarray):
+        # Sort rows by list so every list is a contiguous block
+        assignment = _assign(vectors, self._centroids)
+        order = np.argsort(assignment, kind='stable')
+        self._vectors = np.ascontiguousarray(vectors[order], dtype=np.float32)
+        self._column_ids = supplier_ids[order]
+        counts = np.bincount(assignment, minlength=len(self._centroids))
+        self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self._columns = dict(zip(self._column_ids.tolist(), range(len(self._column_ids))))
+        self._delta = {}
+
+    def _tombstone(self, supplier_id: int):
+        col = self._columns.pop(supplier_id, None)
+        if col is not None:
+            self._column_ids[col] = -1
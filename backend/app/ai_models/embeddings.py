@@ -0,0 +1,84 @@
+import json
+from functools import lru_cache
+from typing import Any, Dict, List
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+
+class HashedNgramEmbedder:
+    """
+    Dense profile embeddings from hashed character n-grams.
+
+    Each word's n-grams are hashed straight into ``dim`` signed buckets,
+    which acts as a random projection of the n-gram counts. Nothing is
+    fitted, so any process embeds queries the same way the index was built.
+    Shared word stems and misspellings ("fabric"/"fabrics", "aluminum"/
+    "aluminium") land close together, which whole-word TF-IDF misses.
+    """
+
+    def __init__(self, dim: int = 256, ngram_range=(3, 5)):
+        self.dim = dim
+        self.ngram_range = tuple(ngram_range)
+        self._vectorizer = HashingVectorizer(
+            analyzer='char_wb',
+            ngram_range=self.ngram_range,
+            n_features=dim,
+            alternate_sign=True,
+            norm='l2'
+        )
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        One L2-normalized float32 row per text; empty texts embed to zeros
+        """
+        return self._vectorizer.transform(texts).toarray().astype(np.float32)
+
+    def config(self) -> Dict[str, Any]:
+        return {"type": "hashed_ngram", "dim": self.dim, "ngram_range": list(self.ngram_range)}
+
+
+class SentenceTransformerEmbedder:
+    """
+    Dense profile embeddings from a locally stored sentence-transformers model, run on CPU
+    """
+
+    def __init__(self, model_path: str):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("Embedding with a local model needs the sentence-transformers package") from None
+        self.model_path = model_path
+        self.model = SentenceTransformer(model_path, device='cpu')
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        One L2-normalized float32 row per text
+        """
+        return self.model.encode(
+            texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False
+        ).astype(np.float32)
+
+    def config(self) -> Dict[str, Any]:
+        return {"type": "sentence_transformer", "model": self.model_path, "dim": self.dim}
+
+
+def load_embedder(config: Dict[str, Any]):
+    """
+    Recreate the embedder described by an index manifest
+
+    Embedders are cached per config, so switching to a new index version
+    doesn't reload the model.
+    """
+    return _cached_embedder(json.dumps(config, sort_keys=True))
+
+
+@lru_cache(maxsize=4)
+def _cached_embedder(config_json: str):
+    config = json.loads(config_json)
+    if config["type"] == "hashed_ngram":
+        return HashedNgramEmbedder(dim=config["dim"], ngram_range=config["ngram_range"])
+    if config["type"] == "sentence_transformer":
+        return SentenceTransformerEmbedder(config["model"])
+    raise ValueError(f"Unknown embedder type {config['type']!r}")
@@ -0,0 +1,89 @@
+import numpy as np
+from typing import Any, Dict, Optional
+
+from app.ai_models.artifacts import load_array, save_array
+
+# Marks a leaf in ``left``/``right``, as in sklearn's tree arrays
+TREE_LEAF = -1
+
+
+class FlatForest:
+    """
+    A fitted regression forest flattened into a handful of node arrays.
+
+    Every tree's nodes are concatenated into shared ``feature``,
+    ``threshold``, ``left``, ``right`` and ``value`` arrays, with child
+    indices offset to be global and ``roots`` pointing at each tree's first
+    node. Prediction walks all trees for all rows one level at a time with
+    numpy, so the arrays can be memory-mapped and shared between processes
+    instead of each one unpickling its own estimator objects.
+    """
+
+    ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, value: np.ndarray, roots: np.ndarray):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+
+    @classmethod
+    def from_estimator(cls, forest) -> "FlatForest":
+        """
+        Flatten a fitted single-output ``RandomForestRegressor``
+        """
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        sizes = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        def children(side: np.ndarray, offset: int) -> np.ndarray:
+            return np.where(side == TREE_LEAF, TREE_LEAF, side + offset)
+
+        return cls(
+            feature=np.concatenate([tree.feature for tree in trees]).astype(np.int32),
+            threshold=np.concatenate([tree.threshold for tree in trees]).astype(np.float64),
+            left=np.concatenate([children(tree.children_left, offset) for tree, offset in zip(trees, offsets)]).astype(np.int32),
+            right=np.concatenate([children(tree.children_right, offset) for tree, offset in zip(trees, offsets)]).astype(np.int32),
+            value=np.concatenate([tree.value[:, 0, 0] for tree in trees]).astype(np.float64),
+            roots=offsets.astype(np.int32)
+        )
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Mean prediction over all trees, one value per row of ``X``
+        """
+        # sklearn compares float32 features against its thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_rows = len(X)
+        # One (tree, row) walk per slot, tree-major; walks drop out at their leaf
+        nodes = np.repeat(self.roots, n_rows)
+        rows = np.tile(np.arange(n_rows), len(self.roots))
+        active = np.arange(len(nodes))
+        while active.size:
+            current = nodes[active]
+            left = self.left[current]
+            internal = left != TREE_LEAF
+            active, current, left = active[internal], current[internal], left[internal]
+            go_left = X[rows[active], self.feature[current]] <= self.threshold[current]
+            nodes[active] = np.where(go_left, left, self.right[current])
+        return self.value[nodes].reshape(len(self.roots), n_rows).mean(axis=0)
+
+    def save(self, directory: str) -> Dict[str, Any]:
+        """
+        Write the node arrays to ``directory``; returns the manifest entries ``load`` needs
+        """
+        return {
+            "n_trees": len(self.roots),
+            "n_nodes": len(self.feature),
+            "files": [save_array(directory, name, getattr(self, name)) for name in self.ARRAYS]
+        }
+
+    @classmethod
+    def load(cls, directory: str, manifest: Dict[str, Any], mmap_mode: Optional[str] = 'r') -> "FlatForest":
+        """
+        Open a forest written by ``save``, memory-mapping its arrays
+        """
+        return cls(**{name: load_array(directory, name, mmap_mode) for name in cls.ARRAYS})
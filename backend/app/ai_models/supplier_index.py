@@ -0,0 +1,212 @@
+import json
+import os
+import numpy as np
+import scipy.sparse as sp
+from typing import List, Dict, Any, Optional, Tuple
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.ai_models.artifacts import load_array, save_array
+
+
+def profile_text(profile: Dict[str, Any]) -> str:
+    """
+    Build the text used to vectorize a buyer or supplier profile
+    """
+    return f"{profile.get('company_name') or ''} {profile.get('business_type') or ''} {profile.get('description') or ''}"
+
+
+class SupplierIndex:
+    """
+    Sparse, L2-normalized supplier vector index with top-k retrieval.
+
+    Supplier vectors are stored as an inverted index (terms x suppliers), so a
+    query only touches the postings of the terms it contains instead of every
+    supplier. Suppliers added or updated after the fit go to a small delta
+    segment and removed suppliers are tombstoned; both are folded into the
+    inverted index once the delta grows past ``compact_threshold``. The
+    vocabulary and IDF weights stay fixed until the next full ``fit``.
+
+    ``save`` writes the index as plain ``.npy`` arrays plus its vocabulary,
+    and ``load`` memory-maps them, so processes loading the same files share
+    their pages through the OS cache.
+    """
+
+    def __init__(self, max_features: int = 1000, compact_threshold: int = 256):
+        self.vectorizer = TfidfVectorizer(max_features=max_features, stop_words='english')
+        self.compact_threshold = compact_threshold
+        self.is_fitted = False
+        self._postings = sp.csr_matrix((0, 0))
+        self._column_ids = np.empty(0, dtype=np.int64)
+        self._columns: Dict[int, int] = {}
+        self._delta: Dict[int, sp.csr_matrix] = {}
+
+    def __len__(self) -> int:
+        return len(self._columns) + len(self._delta)
+
+    def __contains__(self, supplier_id: int) -> bool:
+        return supplier_id in self._columns or supplier_id in self._delta
+
+    def fit(self, supplier_ids: List[int], profiles: List[Dict[str, Any]]):
+        """
+        Fit the vocabulary and build the index from scratch
+        """
+        vectors = self.vectorizer.fit_transform([profile_text(p) for p in profiles])
+        self._build(np.asarray(supplier_ids, dtype=np.int64), vectors.tocsr())
+        self.is_fitted = True
+
+    def upsert(self, supplier_id: int, profile: Dict[str, Any]):
+        """
+        Add or replace a single supplier without refitting the vocabulary
+        """
+        if not self.is_fitted:
+            return
+        self._tombstone(supplier_id)
+        self._delta[supplier_id] = self.vectorizer.transform([profile_text(profile)]).tocsr()
+        if len(self._delta) >= self.compact_threshold:
+            self.compact()
+
+    def remove(self, supplier_id: int):
+        """
+        Remove a supplier from the index
+        """
+        self._tombstone(supplier_id)
+        self._delta.pop(supplier_id, None)
+
+    def compact(self):
+        """
+        Fold the delta segment into the inverted index and drop tombstones
+        """
+        live = np.flatnonzero(self._column_ids >= 0)
+        ids = [self._column_ids[live]]
+        blocks = [self._postings[:, live].T.tocsr()] if len(live) else []
+        if self._delta:
+            ids.append(np.fromiter(self._delta.keys(), dtype=np.int64, count=len(self._delta)))
+            blocks.append(sp.vstack(list(self._delta.values()), format='csr'))
+        vectors = sp.vstack(blocks, format='csr') if blocks else sp.csr_matrix((0, self._n_terms()))
+        self._build(np.concatenate(ids), vectors)
+
+    def search(self, profile: Dict[str, Any], top_n: int = 5, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Return the ``top_n`` (supplier_id, cosine similarity) pairs for a profile
+
+        The search is always exact; ``nprobe`` is accepted for parity with
+        ``EmbeddingIndex`` and ignored.
+        """
+        return self.search_batch([profile], top_n=top_n)[0]
+
+    def search_batch(self, profiles: List[Dict[str, Any]], top_n: int = 5, nprobe: Optional[int] = None) -> List[List[Tuple[int, float]]]:
+        """
+        ``search`` for many profiles, scored with one sparse matrix-matrix product
+        """
+        if not self.is_fitted or top_n <= 0:
+            return [[] for _ in profiles]
+
+        queries = self.vectorizer.transform([profile_text(p) for p in profiles]).tocsr()
+
+        # Only suppliers sharing at least one term with a query get a score
+        scores = (queries @ self._postings).tocsr()
+        if self._delta:
+            delta_ids = np.fromiter(self._delta.keys(), dtype=np.int64, count=len(self._delta))
+            delta_matrix = sp.vstack(list(self._delta.values()), format='csr')
+            delta_scores = (queries @ delta_matrix.T).tocsr()
+
+        results = []
+        for row in range(len(profiles)):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            ids = self._column_ids[scores.indices[start:end]]
+            values = scores.data[start:end]
+            live = ids >= 0
+            ids, values = ids[live], values[live]
+
+            if self._delta:
+                start, end = delta_scores.indptr[row], delta_scores.indptr[row + 1]
+                ids = np.concatenate([ids, delta_ids[delta_scores.indices[start:end]]])
+                values = np.concatenate([values, delta_scores.data[start:end]])
+
+            if len(values) > top_n:
+                top = np.argpartition(-values, top_n - 1)[:top_n]
+                ids, values = ids[top], values[top]
+            order = np.argsort(-values, kind='stable')
+            results.append([(int(ids[i]), float(values[i])) for i in order])
+
+        return results
+
+    def save(self, directory: str) -> Dict[str, Any]:
+        """
+        Write the fitted index to ``directory``; returns the manifest entries ``load`` needs
+        """
+        if not self.is_fitted:
+            raise ValueError("Cannot save an index that has not been fitted")
+        # Saved indexes have no delta segment or tombstones
+        if self._delta or len(self._columns) < len(self._column_ids):
+            self.compact()
+
+        terms = [None] * len(self.vectorizer.vocabulary_)
+        for term, column in self.vectorizer.vocabulary_.items():
+            terms[column] = term
+        with open(os.path.join(directory, "vocabulary.json"), "w") as vocabulary_file:
+            json.dump(terms, vocabulary_file)
+
+        return {
+            "index_type": "tfidf",
+            "max_features": self.vectorizer.max_features,
+            "compact_threshold": self.compact_threshold,
+            "n_terms": len(terms),
+            "n_suppliers": len(self._column_ids),
+            "files": [
+                "vocabulary.json",
+                save_array(directory, "idf", self.vectorizer.idf_),
+                save_array(directory, "postings_data", self._postings.data),
+                save_array(directory, "postings_indices", self._postings.indices),
+                save_array(directory, "postings_indptr", self._postings.indptr),
+                save_array(directory, "column_ids", self._column_ids)
+            ]
+        }
+
+    @classmethod
+    def load(cls, directory: str, manifest: Dict[str, Any], mmap_mode: Optional[str] = 'r') -> "SupplierIndex":
+        """
+        Open an index written by ``save``, memory-mapping its arrays
+        """
+        index = cls(max_features=manifest["max_features"], compact_threshold=manifest["compact_threshold"])
+        with open(os.path.join(directory, "vocabulary.json")) as vocabulary_file:
+            terms = json.load(vocabulary_file)
+        index.vectorizer = TfidfVectorizer(
+            max_features=manifest["max_features"],
+            stop_words='english',
+            vocabulary={term: column for column, term in enumerate(terms)}
+        )
+        index.vectorizer.idf_ = load_array(directory, "idf", mmap_mode=None)
+
+        # The postings are only read, so they stay shared; tombstones write
+        # to the supplier ids, so those are mapped copy-on-write
+        postings = sp.csr_matrix(
+            (
+                load_array(directory, "postings_data", mmap_mode),
+                load_array(directory, "postings_indices", mmap_mode),
+                load_array(directory, "postings_indptr", mmap_mode)
+            ),
+            shape=(manifest["n_terms"], manifest["n_suppliers"]),
+            copy=False
+        )
+        column_ids = load_array(directory, "column_ids", 'c' if mmap_mode else None)
+        index._postings = postings
+        index._column_ids = column_ids
+        index._columns = dict(zip(column_ids.tolist(), range(len(column_ids))))
+        index.is_fitted = True
+        return index
+
+    def _build(self, supplier_ids: np.ndarray, vectors: sp.csr_matrix):
+        # Store transposed so a query walks term postings, not supplier rows
+        self._postings = vectors.T.tocsr()
+        self._column_ids = supplier_ids.copy()
+        self._columns = dict(zip(supplier_ids.tolist(), range(len(supplier_ids))))
+        self._delta = {}
+
+    def _tombstone(self, supplier_id: int):
+        col = self._columns.pop(supplier_id, None)
+        if col is not None:
+            self._column_ids[col] = -1
+
+    def _n_terms(self) -> int:
+        return len(self.vectorizer.vocabulary_) if self.is_fitted else 0
@@ -1,19 +1,35 @@
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Any
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import List, Dict, Any, Callable, Optional
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 import joblib
 import os
 
+from app.ai_models.supplier_index import SupplierIndex
+
+# Candidates drawn from each signal per requested recommendation before blending
+BLEND_CANDIDATE_FACTOR = 4
+
+# Supplier score factors and their default weights
+SUPPLIER_SCORE_FACTORS = ['rating_factor', 'completion_rate', 'response_time', 'quality']
+DEFAULT_SUPPLIER_SCORE_WEIGHTS = [0.4, 0.3, 0.2, 0.1]
+
 class SupplyChainAI:
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+    def __init__(self, supplier_score_weights: Optional[List[float]] = None, supplier_index_factory: Optional[Callable] = None):
+        # Builds an empty matching index: sparse TF-IDF unless told otherwise
+        self.supplier_index_factory = supplier_index_factory or (lambda: SupplierIndex(max_features=1000))
+        self.supplier_index = self.supplier_index_factory()
         self.demand_model = RandomForestRegressor(n_estimators=100, random_state=42)
-        self.supplier_similarity_matrix = None
+        self.supplier_score_weights = np.asarray(
+            supplier_score_weights if supplier_score_weights is not None else DEFAULT_SUPPLIER_SCORE_WEIGHTS,
+            dtype=float
+        )
         self.is_trained = False
+        self.is_demand_trained = False
+        # Order-history model blended into supplier matching, when loaded
+        self.collaborative_model = None
+        self.collaborative_weight = 0.0
         
     def train_supplier_matching(self, suppliers_data: List[Dict[str, Any]]):
         """
@@ -22,50 +38,89 @@ class SupplyChainAI:
         if not suppliers_data:
             return
             
-        # Extract features for supplier matching
-        supplier_descriptions = []
-        supplier_categories = []
-        
-        for supplier in suppliers_data:
-            description = f"{supplier.get('company_name', '')} {supplier.get('business_type', '')} {supplier.get('description', '')}"
-            supplier_descriptions.append(description)
-            supplier_categories.append(supplier.get('category', 'general'))
+        # Suppliers without an explicit id fall back to their position
+        supplier_ids = [supplier.get('id', idx) for idx, supplier in enumerate(suppliers_data)]
         
-        # Create TF-IDF vectors
-        tfidf_matrix = self.vectorizer.fit_transform(supplier_descriptions)
-        
-        # Calculate similarity matrix
-        self.supplier_similarity_matrix = cosine_similarity(tfidf_matrix)
+        # Build a fresh index and swap it in, so readers never see a
+        # half-built one
+        supplier_index = self.supplier_index_factory()
+        supplier_index.fit(supplier_ids, suppliers_data)
+        self.supplier_index = supplier_index
         
         self.is_trained = True
+    
+    def add_supplier(self, supplier: Dict[str, Any]):
+        """
+        Add or update a single supplier in the matching index without a refit
+        """
+        self.supplier_index.upsert(supplier['id'], supplier)
+    
+    def remove_supplier(self, supplier_id: int):
+        """
+        Remove a supplier from the matching index
+        """
+        self.supplier_index.remove(supplier_id)
         
-    def get_supplier_recommendations(self, buyer_profile: Dict[str, Any], top_n: int = 5) -> List[Dict[str, Any]]:
+    def get_supplier_recommendations(self, buyer_profile: Dict[str, Any], top_n: int = 5, nprobe: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Get AI-powered supplier recommendations for a buyer
+
+        With an embedding index, ``nprobe`` sets how many of its lists are
+        scanned: more finds more of the true nearest suppliers, fewer
+        answers faster. The index default applies when it is None.
+        """
+        return self.get_supplier_recommendations_batch([buyer_profile], top_n=top_n, nprobe=nprobe)[0]
+    
+    def get_supplier_recommendations_batch(self, buyer_profiles: List[Dict[str, Any]], top_n: int = 5, nprobe: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Supplier recommendations for many buyers, matched against the index in one batch
+
+        Buyers whose profile carries an ``id`` with order history in the
+        collaborative model get a blend of both signals.
         """
         if not self.is_trained:
-            return []
-            
-        # Extract buyer preferences
-        buyer_description = f"{buyer_profile.get('company_name', '')} {buyer_profile.get('business_type', '')} {buyer_profile.get('description', '')}"
+            return [[] for _ in buyer_profiles]
         
-        # Transform buyer description
-        buyer_vector = self.vectorizer.transform([buyer_description])
+        blending = self.collaborative_model is not None and self.collaborative_weight > 0
+        candidates = top_n * BLEND_CANDIDATE_FACTOR if blending else top_n
         
-        # Calculate similarities
-        similarities = cosine_similarity(buyer_vector, self.vectorizer.transform(supplier_descriptions))
+        # Top-k retrieval over the supplier index
+        content_matches = self.supplier_index.search_batch(buyer_profiles, top_n=candidates, nprobe=nprobe)
+        if not blending:
+            collaborative_matches = [[] for _ in buyer_profiles]
+        else:
+            collaborative_matches = self.collaborative_model.score_batch(
+                [profile.get('id') for profile in buyer_profiles], top_n=candidates
+            )
         
-        # Get top recommendations
-        top_indices = np.argsort(similarities[0])[-top_n:][::-1]
+        return [
+            self._blend(dict(content), dict(collaborative), top_n)
+            for content, collaborative in zip(content_matches, collaborative_matches)
+        ]
+    
+    def _blend(self, content: Dict[int, float], collaborative: Dict[int, float], top_n: int) -> List[Dict[str, Any]]:
+        # Without order history the text similarity ranks alone
+        weight = self.collaborative_weight if collaborative else 0.0
+        scores = {
+            supplier_id: (1 - weight) * content.get(supplier_id, 0.0) + weight * collaborative.get(supplier_id, 0.0)
+            for supplier_id in content.keys() | collaborative.keys()
+        }
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_n]
         
         recommendations = []
-        for idx in top_indices:
+        for supplier_id, score in ranked:
+            collaborative_score = collaborative.get(supplier_id, 0.0)
             recommendations.append({
-                'supplier_id': idx,
-                'similarity_score': float(similarities[0][idx]),
-                'recommendation_reason': f"High compatibility based on business type and requirements"
+                'supplier_id': supplier_id,
+                'similarity_score': content.get(supplier_id, 0.0),
+                'collaborative_score': collaborative_score,
+                'score': score,
+                'recommendation_reason': (
+                    "Ordered from by buyers who use the same suppliers as you"
+                    if weight * collaborative_score > (1 - weight) * content.get(supplier_id, 0.0)
+                    else "High compatibility based on business type and requirements"
+                )
             })
-            
         return recommendations
     
     def train_demand_forecasting(self, historical_data: List[Dict[str, Any]]):
@@ -86,83 +141,145 @@ class SupplyChainAI:
         # Train model
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         self.demand_model.fit(X_train, y_train)
+        self.is_demand_trained = True
         
     def forecast_demand(self, product_info: Dict[str, Any]) -> Dict[str, Any]:
         """
         Forecast demand for a product
         """
-        if not self.is_trained:
-            return {'forecast': 0, 'confidence': 0}
-            
-        # Prepare features
+        return self.forecast_demand_batch([product_info])[0]
+    
+    def forecast_demand_batch(self, products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Forecast demand for many products with a single model call
+        """
+        if not self.is_demand_trained:
+            return [{'forecast': 0, 'confidence': 0} for _ in products]
+        if not products:
+            return []
+        
+        # Prepare one feature matrix for all products
         features = np.array([[
             product_info.get('category', 0),
             product_info.get('season', 0),
             product_info.get('month', 0),
             product_info.get('previous_demand', 0)
-        ]])
+        ] for product_info in products], dtype=float)
+        previous_demand = features[:, 3]
         
-        # Make prediction
-        forecast = self.demand_model.predict(features)[0]
+        # Make predictions
+        forecasts = self.demand_model.predict(features)
         
-        # Calculate confidence (simplified)
-        confidence = min(0.95, max(0.5, 1.0 - abs(forecast - product_info.get('previous_demand', 0)) / max(forecast, 1)))
+        # Calculate confidence (simplified) and trend for every row at once
+        confidence = np.clip(1.0 - np.abs(forecasts - previous_demand) / np.maximum(forecasts, 1), 0.5, 0.95)
+        trends = np.where(forecasts > previous_demand, 'increasing', 'decreasing')
         
-        return {
-            'forecast': int(forecast),
-            'confidence': float(confidence),
-            'trend': 'increasing' if forecast > product_info.get('previous_demand', 0) else 'decreasing'
-        }
+        return [
+            {'forecast': int(forecast), 'confidence': float(conf), 'trend': str(trend)}
+            for forecast, conf, trend in zip(forecasts, confidence, trends)
+        ]
     
-    def calculate_supplier_score(self, supplier_data: Dict[str, Any], order_history: List[Dict[str, Any]]) -> float:
+    def supplier_score_factors(self, rating, completion_rate, avg_response_time, quality_score) -> np.ndarray:
         """
-        Calculate AI-powered supplier score based on multiple factors
+        Unweighted score factors, one row per supplier; missing (NaN) inputs take defaults
         """
-        score = 0.0
+        # Rating factor
+        rating = np.nan_to_num(np.asarray(rating, dtype=float), nan=0.0)
         
-        # Rating factor (40%)
-        rating = supplier_data.get('rating', 0)
-        score += rating * 0.4
+        # Order completion rate
+        completion_rate = np.nan_to_num(np.asarray(completion_rate, dtype=float), nan=0.0)
         
-        # Order completion rate (30%)
-        if order_history:
-            completed_orders = sum(1 for order in order_history if order.get('status') == 'delivered')
-            completion_rate = completed_orders / len(order_history)
-            score += completion_rate * 0.3
+        # Response time factor
+        avg_response_time = np.nan_to_num(np.asarray(avg_response_time, dtype=float), nan=24.0)  # hours
+        response_score = np.maximum(0, 1 - (avg_response_time - 1) / 48)  # Normalize to 0-1
         
-        # Response time factor (20%)
-        avg_response_time = supplier_data.get('avg_response_time', 24)  # hours
-        response_score = max(0, 1 - (avg_response_time - 1) / 48)  # Normalize to 0-1
-        score += response_score * 0.2
+        # Quality factor
+        quality_score = np.nan_to_num(np.asarray(quality_score, dtype=float), nan=0.8)
         
-        # Quality factor (10%)
-        quality_score = supplier_data.get('quality_score', 0.8)
-        score += quality_score * 0.1
+        return np.column_stack([rating, completion_rate, response_score, quality_score])
+    
+    def score_suppliers(self, factors: np.ndarray) -> np.ndarray:
+        """
+        Weighted supplier scores for a factor matrix from ``supplier_score_factors``
+        """
+        return np.clip(factors @ self.supplier_score_weights, 0.0, 1.0)
+    
+    def supplier_score_breakdown(self, supplier_data: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Weighted contribution of each factor to the supplier score
+        """
+        factors = self._supplier_data_factors(supplier_data)[0]
+        return dict(zip(SUPPLIER_SCORE_FACTORS, (factors * self.supplier_score_weights).tolist()))
+    
+    def calculate_supplier_score(self, supplier_data: Dict[str, Any], order_history: Optional[List[Dict[str, Any]]] = None) -> float:
+        """
+        Calculate AI-powered supplier score based on multiple factors
+
+        Pass ``completion_rate`` in ``supplier_data`` when it is already known;
+        ``order_history`` is only used to derive it otherwise.
+        """
+        if order_history and 'completion_rate' not in supplier_data:
+            completed_orders = sum(1 for order in order_history if order.get('status') == 'delivered')
+            supplier_data = {**supplier_data, 'completion_rate': completed_orders / len(order_history)}
         
-        return min(1.0, max(0.0, score))
+        return float(self.score_suppliers(self._supplier_data_factors(supplier_data))[0])
+    
+    def _supplier_data_factors(self, supplier_data: Dict[str, Any]) -> np.ndarray:
+        return self.supplier_score_factors(
+            [supplier_data.get('rating', 0)],
+            [supplier_data.get('completion_rate', 0)],
+            [supplier_data.get('avg_response_time', np.nan)],
+            [supplier_data.get('quality_score', np.nan)]
+        )
     
     def save_model(self, filepath: str):
         """
-        Save trained models to disk
+        Save the demand model to disk
+
+        The supplier index has its own memory-mappable format; see
+        ``SupplierIndex.save``.
         """
         model_data = {
-            'vectorizer': self.vectorizer,
             'demand_model': self.demand_model,
-            'supplier_similarity_matrix': self.supplier_similarity_matrix,
-            'is_trained': self.is_trained
+            'is_demand_trained': self.is_demand_trained
         }
         joblib.dump(model_data, filepath)
     
     def load_model(self, filepath: str):
         """
-        Load trained models from disk
+        Load the demand model from disk
         """
         if os.path.exists(filepath):
             model_data = joblib.load(filepath)
-            self.vectorizer = model_data['vectorizer']
             self.demand_model = model_data['demand_model']
-            self.supplier_similarity_matrix = model_data['supplier_similarity_matrix']
-            self.is_trained = model_data['is_trained']
+            self.is_demand_trained = model_data.get('is_demand_trained', False)
+            # Files saved before the supplier index moved out still carry it
+            if 'supplier_index' in model_data:
+                self.supplier_index = model_data['supplier_index']
+                self.is_trained = model_data.get('is_trained', False)
+
+    def load_demand_model(self, demand_model):
+        """
+        Swap in a prebuilt demand model, such as a ``FlatForest`` opened from disk
+        """
+        self.demand_model = demand_model
+        self.is_demand_trained = True
+
+    def load_collaborative_model(self, model, weight: float):
+        """
+        Blend a collaborative model, such as ``VendorCoOccurrence``, into supplier
+        recommendations with ``weight`` (0 to 1) against profile similarity
+        """
+        self.collaborative_model = model
+        self.collaborative_weight = weight
+
+    def load_supplier_index(self, supplier_index):
+        """
+        Swap in a prebuilt supplier index, such as one opened with ``SupplierIndex.load``
+        or ``EmbeddingIndex.load``
+        """
+        self.supplier_index = supplier_index
+        self.is_trained = supplier_index.is_fitted
 
 # Global AI instance
 ai_service = SupplyChainAI()
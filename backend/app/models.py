@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Float, Enum
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Text, ForeignKey, Float, Enum, Index, JSON, event, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -79,6 +79,17 @@ class BuyerProfile(Base):
     user = relationship("User", back_populates="buyer_profile")
     orders = relationship("Order", back_populates="buyer")
 
+class BuyerRecommendation(Base):
+    __tablename__ = "buyer_recommendations"
+    
+    # Precomputed supplier recommendations, refreshed when the buyer profile
+    # or the supplier model version changes
+    buyer_id = Column(Integer, ForeignKey("buyer_profiles.id"), primary_key=True)
+    model_version = Column(String, nullable=False)
+    profile_fingerprint = Column(String, nullable=False)
+    recommendations = Column(JSON, nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class Product(Base):
     __tablename__ = "products"
     
@@ -100,6 +111,50 @@ class Product(Base):
     vendor = relationship("VendorProfile", back_populates="products")
     order_items = relationship("OrderItem", back_populates="product")
 
+class InventorySummary(Base):
+    __tablename__ = "inventory_summaries"
+    
+    # Maintained incrementally from product changes and stock reservations
+    vendor_id = Column(Integer, ForeignKey("vendor_profiles.id"), primary_key=True)
+    sku_count = Column(Integer, nullable=False, default=0)
+    total_units = Column(Integer, nullable=False, default=0)
+    total_stock_value = Column(Float, nullable=False, default=0.0)
+    low_stock_count = Column(Integer, nullable=False, default=0)
+    out_of_stock_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ProductMovement(Base):
+    __tablename__ = "product_movements"
+    
+    # Units reserved per product per day, for top movers
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    vendor_id = Column(Integer, ForeignKey("vendor_profiles.id"), nullable=False)
+    units = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index("idx_product_movements_vendor_id_day", vendor_id, day),
+    )
+
+class StockAlert(Base):
+    __tablename__ = "stock_alerts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    vendor_id = Column(Integer, ForeignKey("vendor_profiles.id"), nullable=False)
+    sku = Column(String)
+    quantity_available = Column(Integer, nullable=False)
+    reorder_point = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    resolved_at = Column(DateTime(timezone=True))
+    
+    # At most one open alert per product
+    __table_args__ = (
+        Index("idx_stock_alerts_open_product_id", product_id, unique=True,
+              postgresql_where=resolved_at.is_(None), sqlite_where=resolved_at.is_(None)),
+        Index("idx_stock_alerts_vendor_id", vendor_id),
+    )
+
 class Order(Base):
     __tablename__ = "orders"
     
@@ -120,6 +175,12 @@ class Order(Base):
     vendor = relationship("VendorProfile", back_populates="orders")
     order_items = relationship("OrderItem", back_populates="order")
     shipments = relationship("Shipment", back_populates="order")
+    
+    # Order listings page through one party's orders newest first
+    __table_args__ = (
+        Index("idx_orders_buyer_id_created_at", buyer_id, created_at.desc(), id.desc()),
+        Index("idx_orders_vendor_id_created_at", vendor_id, created_at.desc(), id.desc()),
+    )
 
 class OrderItem(Base):
     __tablename__ = "order_items"
@@ -134,6 +195,12 @@ class OrderItem(Base):
     # Relationships
     order = relationship("Order", back_populates="order_items")
     product = relationship("Product", back_populates="order_items")
+    
+    # Demand aggregation joins items to their orders and products
+    __table_args__ = (
+        Index("idx_order_items_order_id", order_id),
+        Index("idx_order_items_product_id", product_id),
+    )
 
 class Shipment(Base):
     __tablename__ = "shipments"
@@ -150,3 +217,37 @@ class Shipment(Base):
     
     # Relationships
     order = relationship("Order", back_populates="shipments")
+
+# Full-text and trigram search (PostgreSQL only). The generated tsvector
+# columns aren't mapped, so the models still work on other databases; the
+# statements are idempotent and bring existing databases up to date on
+# the next create_all.
+SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(sku, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    """
+    ALTER TABLE vendor_profiles ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(company_name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(business_type, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_products_search_vector ON products USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING GIN (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_products_sku_trgm ON products USING GIN (sku gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS idx_vendor_profiles_search_vector ON vendor_profiles USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS idx_vendor_profiles_company_name_trgm ON vendor_profiles USING GIN (company_name gin_trgm_ops)",
+]
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_columns(target, connection, **kw):
+    if connection.dialect.name == "postgresql":
+        for statement in SEARCH_DDL:
+            connection.execute(text(statement))
@@ -1,149 +1,301 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, VendorProfile, BuyerProfile, Order
-from app.routers.auth import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, AsyncIterator, List, Optional, Tuple, Union
+import json
+import os
+from app.database import get_async_db
+from app.models import VendorProfile, BuyerProfile
+from app.routers.auth import get_current_user, require_role
 from app.ai_models.supply_chain_ai import ai_service
+from app.services.principal_cache import Principal
+from app.services.collaborative_model import collaborative_model_registry
+from app.services.recommendation_cache import buyer_recommendations, schedule_recommendation_refresh
+from app.services.response_cache import response_cache
+from app.services.supplier_model import supplier_model_registry
+from app.services.demand_forecast import forecast_models, forecast_products
+from app.services.supplier_ranking import rank_suppliers, score_recommendation
+from app.services.supplier_stats import empty_vendor_stats, vendor_order_stats, vendor_order_watermark
+from app.schemas import ForecastProductRequest
+from app.tasks.scoring import recompute_supplier_scores
+from app.tasks.training import retrain_demand_models, retrain_supplier_collaborative, retrain_supplier_matching
 
 router = APIRouter()
 
+# Products forecast per worker-thread call in the batch endpoint
+FORECAST_BATCH_CHUNK_SIZE = 1000
+# Largest batch accepted; the whole body is held in memory while it streams back
+FORECAST_BATCH_MAX_ROWS = int(os.getenv("FORECAST_BATCH_MAX_ROWS", "100000"))
+
+def confidence_level(confidence: float) -> str:
+    return "high" if confidence > 0.8 else "medium" if confidence > 0.6 else "low"
+
 @router.get("/recommendations")
 async def get_supplier_recommendations(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(require_role("buyer")),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get AI-powered supplier recommendations for the current user
     """
-    if current_user.role != "buyer":
-        raise HTTPException(status_code=403, detail="Access denied. Buyers only.")
-    
     # Get buyer profile
-    buyer_profile = db.query(BuyerProfile).filter(BuyerProfile.user_id == current_user.id).first()
+    buyer_profile = await db.scalar(select(BuyerProfile).where(BuyerProfile.user_id == current_user.id))
     if not buyer_profile:
         raise HTTPException(status_code=404, detail="Buyer profile not found")
     
-    # Get all vendors for recommendations
-    vendors = db.query(VendorProfile).all()
-    
-    # Convert to format expected by AI service
-    suppliers_data = []
-    for vendor in vendors:
-        suppliers_data.append({
-            'company_name': vendor.company_name,
-            'business_type': vendor.business_type,
-            'description': vendor.description,
-            'category': vendor.business_type,
-            'rating': vendor.rating
-        })
-    
-    # Train the AI model if not already trained
-    if not ai_service.is_trained:
-        ai_service.train_supplier_matching(suppliers_data)
+    # Make sure the supplier model matches the vendor table; a stale model
+    # keeps serving while a rebuild runs in the background
+    vendor_watermark = await run_in_threadpool(supplier_model_registry.ensure_current)
+    # Order history blended in; retrained in the background as orders come in
+    await run_in_threadpool(collaborative_model_registry.ensure_current)
     
-    # Get recommendations
-    buyer_data = {
-        'company_name': buyer_profile.company_name,
-        'business_type': buyer_profile.business_type,
-        'description': buyer_profile.description
-    }
+    # Precomputed recommendations; only a miss is matched live
+    recommendations, freshness = await buyer_recommendations(db, buyer_profile)
+    if freshness["status"] == "stale":
+        await run_in_threadpool(schedule_recommendation_refresh, [buyer_profile.id])
     
-    recommendations = ai_service.get_supplier_recommendations(buyer_data, top_n=5)
+    # Load only the recommended vendors
+    vendor_ids = [rec['supplier_id'] for rec in recommendations]
+    vendors_by_id = {
+        vendor.id: vendor
+        for vendor in await db.scalars(select(VendorProfile).where(VendorProfile.id.in_(vendor_ids)))
+    } if vendor_ids else {}
     
     # Format response with vendor details
     result = []
     for rec in recommendations:
-        vendor = vendors[rec['supplier_id']]
+        vendor = vendors_by_id.get(rec['supplier_id'])
+        if vendor is None:
+            continue
         result.append({
             'vendor_id': vendor.id,
             'company_name': vendor.company_name,
             'business_type': vendor.business_type,
             'rating': vendor.rating,
             'similarity_score': rec['similarity_score'],
+            # Entries cached before order history was blended in lack these
+            'collaborative_score': rec.get('collaborative_score', 0.0),
+            'score': rec.get('score', rec['similarity_score']),
             'recommendation_reason': rec['recommendation_reason']
         })
     
-    return {"recommendations": result}
+    # freshness.model_version is the model version to compare; the watermark
+    # is the vendor table state the serving supplier model was built from
+    return {"recommendations": result, "vendor_watermark": vendor_watermark, "freshness": freshness}
+
+@router.post("/recommendations/retrain", status_code=202)
+async def retrain_supplier_recommendations(current_user: Principal = Depends(require_role("admin"))):
+    """
+    Queue a rebuild of the supplier matching model
+    """
+    job = await run_in_threadpool(retrain_supplier_matching.delay, requested_by=current_user.id)
+    return {"job_id": job.id, "status": job.status}
+
+@router.post("/recommendations/collaborative/retrain", status_code=202)
+async def retrain_collaborative_recommendations(current_user: Principal = Depends(require_role("admin"))):
+    """
+    Queue a rebuild of the order-history model blended into supplier recommendations
+    """
+    job = await run_in_threadpool(retrain_supplier_collaborative.delay, requested_by=current_user.id)
+    return {"job_id": job.id, "status": job.status}
 
 @router.get("/forecast")
 async def get_demand_forecast(
+    request: Request,
     product_category: str = "general",
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get AI-powered demand forecast for a product category
     """
-    # Mock historical data for demonstration
-    historical_data = [
-        {'product_category': 1, 'season': 1, 'month': 1, 'previous_demand': 100, 'demand': 120},
-        {'product_category': 1, 'season': 2, 'month': 4, 'previous_demand': 120, 'demand': 110},
-        {'product_category': 1, 'season': 3, 'month': 7, 'previous_demand': 110, 'demand': 130},
-        {'product_category': 1, 'season': 4, 'month': 10, 'previous_demand': 130, 'demand': 125},
-    ]
+    # Cached per-category model; a version check can map a newly published
+    # model and a cold category is loaded or trained, so it runs off the event loop
+    model = await run_in_threadpool(forecast_models.get_or_load, product_category)
+    model_version = forecast_models.version(product_category)
     
-    # Train the model
-    ai_service.train_demand_forecasting(historical_data)
-    
-    # Get forecast
-    product_info = {
+    # Forecast the month after the latest demand the model was trained on
+    product_info = forecast_models.next_period_features(product_category) or {
         'category': 1,
         'season': 1,
         'month': 1,
-        'previous_demand': 125
+        'previous_demand': 0
     }
     
-    forecast = ai_service.forecast_demand(product_info)
+    async def build():
+        forecast = model.forecast_demand(product_info)
+        return {
+            "product_category": product_category,
+            "forecast": forecast,
+            "confidence_level": confidence_level(forecast['confidence']),
+            "model_version": model_version
+        }
     
-    return {
-        "product_category": product_category,
-        "forecast": forecast,
-        "confidence_level": "high" if forecast['confidence'] > 0.8 else "medium" if forecast['confidence'] > 0.6 else "low"
-    }
+    # The forecast only moves with the model version and its input features
+    return await response_cache.respond(
+        request, "forecast", (current_user.id, product_category), (model_version, product_info), build,
+        tags=[f"forecast:{product_category}"]
+    )
+
+async def _iter_ndjson(request: Request) -> AsyncIterator[Tuple[int, bytes]]:
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+    if buffer.strip():
+        yield line_number + 1, buffer
+
+def _validate_forecast_row(line_number: int, row: Any) -> Union[ForecastProductRequest, dict]:
+    try:
+        if isinstance(row, bytes):
+            return ForecastProductRequest.model_validate_json(row)
+        return ForecastProductRequest.model_validate(row)
+    except ValidationError as e:
+        return {"line": line_number, "error": e.errors(include_url=False, include_context=False)}
+
+async def _stream_forecasts(rows: List[Union[ForecastProductRequest, dict]]) -> AsyncIterator[str]:
+    for start in range(0, len(rows), FORECAST_BATCH_CHUNK_SIZE):
+        chunk = rows[start:start + FORECAST_BATCH_CHUNK_SIZE]
+        products = [row for row in chunk if isinstance(row, ForecastProductRequest)]
+        forecasts = iter(await run_in_threadpool(forecast_products, products))
+        
+        lines = []
+        for row in chunk:
+            if isinstance(row, ForecastProductRequest):
+                result = next(forecasts)
+                result["confidence_level"] = confidence_level(result['forecast']['confidence'])
+            else:
+                result = row
+            lines.append(json.dumps(result, default=str) + "\n")
+        yield "".join(lines)
+
+@router.post("/forecast/retrain", status_code=202)
+async def retrain_demand_forecasts(
+    product_category: Optional[List[str]] = Query(None),
+    current_user: Principal = Depends(require_role("admin"))
+):
+    """
+    Queue retraining of demand forecast models; every category with demand by default
+    """
+    job = await run_in_threadpool(retrain_demand_models.delay, product_category, requested_by=current_user.id)
+    return {"job_id": job.id, "status": job.status}
+
+@router.post("/forecast/batch")
+async def get_demand_forecast_batch(
+    request: Request,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Get AI-powered demand forecasts for many products, streamed back as NDJSON
+
+    The body is either a JSON array of products or an NDJSON upload
+    (``application/x-ndjson``) of at most FORECAST_BATCH_MAX_ROWS rows.
+    Invalid rows are reported in place by line.
+    """
+    # The body is read and validated in full before the response starts;
+    # forecasts are then computed chunk by chunk while it streams
+    too_many_rows = HTTPException(status_code=413, detail=f"At most {FORECAST_BATCH_MAX_ROWS} products per batch")
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        rows = []
+        async for line_number, line in _iter_ndjson(request):
+            # Stop reading as soon as the limit is passed
+            if len(rows) >= FORECAST_BATCH_MAX_ROWS:
+                raise too_many_rows
+            rows.append(_validate_forecast_row(line_number, line))
+    else:
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if len(payload) > FORECAST_BATCH_MAX_ROWS:
+            raise too_many_rows
+        rows = [_validate_forecast_row(line_number, row) for line_number, row in enumerate(payload, start=1)]
+    
+    return StreamingResponse(_stream_forecasts(rows), media_type="application/x-ndjson")
 
 @router.get("/scoring")
 async def get_supplier_scoring(
     vendor_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get AI-powered supplier scoring
     """
     # Get vendor
-    vendor = db.query(VendorProfile).filter(VendorProfile.id == vendor_id).first()
+    vendor = await db.get(VendorProfile, vendor_id)
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    # Get order history for this vendor
-    orders = db.query(Order).filter(Order.vendor_id == vendor_id).all()
-    
-    # Convert orders to format expected by AI service
-    order_history = []
-    for order in orders:
-        order_history.append({
-            'status': order.status.value,
-            'created_at': order.created_at.isoformat()
-        })
-    
-    # Calculate supplier score
-    supplier_data = {
-        'rating': vendor.rating,
-        'avg_response_time': 12,  # Mock data
-        'quality_score': 0.9      # Mock data
-    }
-    
-    score = ai_service.calculate_supplier_score(supplier_data, order_history)
+    async def build():
+        # Aggregate order statistics in the database
+        stats = (await db.run_sync(vendor_order_stats, [vendor_id])).get(vendor_id, empty_vendor_stats())
+        
+        # Calculate supplier score; vendors without shipment data get neutral defaults
+        supplier_data = {
+            'rating': vendor.rating,
+            'completion_rate': stats['completion_rate'],
+            'avg_response_time': stats['avg_response_time'],
+            'quality_score': stats['on_time_rate']
+        }
+        
+        breakdown = ai_service.supplier_score_breakdown(supplier_data)
+        score = ai_service.calculate_supplier_score(supplier_data)
+        
+        return {
+            "vendor_id": vendor_id,
+            "company_name": vendor.company_name,
+            "ai_score": round(score, 2),
+            "score_breakdown": {factor: round(value, 2) for factor, value in breakdown.items()},
+            "order_stats": stats,
+            "recommendation": score_recommendation(score)
+        }
     
-    return {
-        "vendor_id": vendor_id,
-        "company_name": vendor.company_name,
-        "ai_score": round(score, 2),
-        "score_breakdown": {
-            "rating_factor": round(vendor.rating * 0.4, 2),
-            "completion_rate": round(0.8 * 0.3, 2),  # Mock data
-            "response_time": round(0.9 * 0.2, 2),    # Mock data
-            "quality": round(0.9 * 0.1, 2)           # Mock data
-        },
-        "recommendation": "Highly recommended" if score > 0.8 else "Recommended" if score > 0.6 else "Consider alternatives"
-    }
+    # Counts and last changes of the vendor's orders and shipments are far
+    # cheaper than the statistics themselves
+    watermark = await db.run_sync(vendor_order_watermark, vendor_id)
+    version = (vendor.updated_at or vendor.created_at, vendor.rating, vendor.company_name, *watermark)
+    return await response_cache.respond(
+        request, "scoring", (current_user.id, vendor_id), version, build, tags=[f"vendor:{vendor_id}"]
+    )
+
+@router.get("/scoring/ranking")
+async def get_supplier_ranking(
+    business_type: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Rank vendors by AI score in one vectorized pass
+    """
+    return await db.run_sync(rank_suppliers, business_type, min_rating, skip, limit)
+
+@router.post("/scoring/recompute", status_code=202)
+async def recompute_supplier_ranking(
+    business_type: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: Principal = Depends(require_role("admin"))
+):
+    """
+    Queue a full scoring pass over the matching vendors; the ranking is the job result
+    """
+    job = await run_in_threadpool(
+        recompute_supplier_scores.delay, business_type, min_rating, limit, requested_by=current_user.id
+    )
+    return {"job_id": job.id, "status": job.status}
@@ -1,51 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from argon2 import PasswordHasher
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User, UserRole
 from app.schemas import UserCreate, UserLogin, Token, UserResponse
+from app.services.principal_cache import Principal, principal_cache
+from app.services.passwords import PasswordHasherBusy, hash_password, needs_rehash, rehash_password, verify_password
 
 load_dotenv()
 
 router = APIRouter()
 security = HTTPBearer()
-ph = PasswordHasher()
 
 # JWT settings
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-def verify_password(plain_password, hashed_password):
-    try:
-        ph.verify(hashed_password, plain_password)
-        return True
-    except:
-        return False
+def credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
-def get_password_hash(password):
-    # Ensure password is a string
-    if isinstance(password, bytes):
-        password = password.decode('utf-8')
-    
-    # Ensure password is not None or empty
-    if not password:
-        raise ValueError("Password cannot be empty")
-    
-    # Use Argon2 for password hashing
-    try:
-        return ph.hash(password)
-    except Exception as e:
-        print(f"Password hashing error: {e}")
-        print(f"Password type: {type(password)}")
-        print(f"Password value: {repr(password)}")
-        raise
+def password_hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, try again shortly",
+        headers={"Retry-After": "1"},
+    )
 
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -57,29 +47,62 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def get_token_claims(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """
+    Decode and validate the bearer token without touching the database
+    """
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise credentials_exception()
+    if payload.get("sub") is None:
+        raise credentials_exception()
+    return payload
+
+async def get_current_user(
+    claims: dict = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    # Tokens issued before the uid claim existed fall back to a username lookup
+    user_id = claims.get("uid")
+    principal = await principal_cache.get(user_id) if user_id is not None else None
+    if principal is None:
+        if user_id is not None:
+            user = await db.get(User, user_id)
+        else:
+            user = await db.scalar(select(User).where(User.username == claims["sub"]))
+        if user is None or user.username != claims["sub"]:
+            raise credentials_exception()
+        principal = Principal.from_user(user)
+        await principal_cache.put(principal)
     
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    if not principal.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
+    return principal
+
+def require_role(*roles: str):
+    """
+    Dependency that only admits principals with one of ``roles``
+
+    The role claim in the token is checked first, so mismatched requests are
+    rejected before any cache or database lookup.
+    """
+    async def dependency(
+        claims: dict = Depends(get_token_claims),
+        db: AsyncSession = Depends(get_async_db)
+    ) -> Principal:
+        if claims.get("role") is not None and claims["role"] not in roles:
+            raise HTTPException(status_code=403, detail="Access denied")
+        principal = await get_current_user(claims, db)
+        if principal.role not in roles:
+            raise HTTPException(status_code=403, detail="Access denied")
+        return principal
+    return dependency
 
 @router.post("/register", response_model=UserResponse)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if db_user:
         raise HTTPException(
             status_code=400,
@@ -87,7 +110,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if username already exists
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await db.scalar(select(User).where(User.username == user.username))
     if db_user:
         raise HTTPException(
             status_code=400,
@@ -95,7 +118,10 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    try:
+        hashed_password = await hash_password(user.password)
+    except PasswordHasherBusy:
+        raise password_hasher_busy()
     db_user = User(
         email=user.email,
         username=user.username,
@@ -104,29 +130,44 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         role=user.role  # Already a string value due to use_enum_values=True
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == user_credentials.username).first()
+async def login(
+    user_credentials: UserLogin,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
+    user = await db.scalar(select(User).where(User.username == user_credentials.username))
     
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    try:
+        valid = user is not None and await verify_password(user_credentials.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise password_hasher_busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Upgrade hashes made with old cost parameters after responding
+    if needs_rehash(user.hashed_password):
+        background_tasks.add_task(rehash_password, user.id, user_credentials.password)
+    
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id, "role": user.role}, expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-async def read_users_me(current_user: User = Depends(get_current_user)):
-    return current_user
+async def read_users_me(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await db.get(User, current_user.id)
@@ -1,37 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, BuyerProfile
-from app.routers.auth import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models import BuyerProfile
+from app.routers.auth import require_role
+from app.services.principal_cache import Principal
+from app.services.response_cache import response_cache
+from app.services.recommendation_cache import schedule_recommendation_refresh
 from app.schemas import BuyerProfileCreate, BuyerProfileResponse
 
 router = APIRouter()
 
 @router.get("/profile", response_model=BuyerProfileResponse)
 async def get_buyer_profile(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: Principal = Depends(require_role("buyer")),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    if current_user.role != "buyer":
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    buyer_profile = db.query(BuyerProfile).filter(BuyerProfile.user_id == current_user.id).first()
+    buyer_profile = await db.scalar(select(BuyerProfile).where(BuyerProfile.user_id == current_user.id))
     if not buyer_profile:
         raise HTTPException(status_code=404, detail="Buyer profile not found")
     
-    return buyer_profile
+    async def build():
+        return BuyerProfileResponse.model_validate(buyer_profile)
+    
+    # Answered with 304 until the profile row changes
+    version = (buyer_profile.id, buyer_profile.updated_at or buyer_profile.created_at)
+    return await response_cache.respond(
+        request, "buyer_profile", (current_user.id,), version, build, tags=[f"user:{current_user.id}"]
+    )
 
 @router.post("/profile", response_model=BuyerProfileResponse)
 async def create_buyer_profile(
     profile: BuyerProfileCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(require_role("buyer")),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    if current_user.role != "buyer":
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     # Check if profile already exists
-    existing_profile = db.query(BuyerProfile).filter(BuyerProfile.user_id == current_user.id).first()
+    existing_profile = await db.scalar(select(BuyerProfile).where(BuyerProfile.user_id == current_user.id))
     if existing_profile:
         raise HTTPException(status_code=400, detail="Buyer profile already exists")
     
@@ -40,7 +47,11 @@ async def create_buyer_profile(
         **profile.dict()
     )
     db.add(buyer_profile)
-    db.commit()
-    db.refresh(buyer_profile)
+    await db.commit()
+    await db.refresh(buyer_profile)
+    
+    # Precompute the new buyer's supplier recommendations
+    await run_in_threadpool(schedule_recommendation_refresh, [buyer_profile.id])
+    await run_in_threadpool(response_cache.invalidate, f"user:{current_user.id}")
     
     return buyer_profile
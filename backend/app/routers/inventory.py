@@ -1,16 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, Product
-from app.routers.auth import get_current_user
+from typing import Literal
+from app.database import get_async_db, get_db
+from app.models import Product, StockAlert, VendorProfile
+from app.routers.auth import get_current_user, require_role
+from app.services.inventory import inventory_status, inventory_version
+from app.services.exports import EXPORT_MEDIA_TYPES, export_headers, stream_export
+from app.services.principal_cache import Principal
+from app.services.response_cache import response_cache
 from app.schemas import ProductCreate, ProductResponse
 
 router = APIRouter()
 
+# Columns written by the inventory export
+PRODUCT_EXPORT_COLUMNS = (
+    Product.id, Product.sku, Product.name, Product.category, Product.price, Product.quantity_available,
+    Product.minimum_order_quantity, Product.unit, Product.is_active, Product.created_at, Product.updated_at
+)
+
 @router.post("/", response_model=ProductResponse)
 async def create_product(
     product: ProductCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # Implementation for creating products
@@ -18,7 +32,7 @@ async def create_product(
 
 @router.get("/", response_model=list[ProductResponse])
 async def get_products(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # Implementation for getting products
@@ -26,8 +40,62 @@ async def get_products(
 
 @router.get("/status")
 async def get_inventory_status(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: Principal = Depends(require_role("vendor")),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Implementation for inventory status
-    pass
+    """
+    Current vendor's inventory summary, read from the incrementally maintained summary table
+    """
+    vendor_id = await db.scalar(select(VendorProfile.id).where(VendorProfile.user_id == current_user.id))
+    if vendor_id is None:
+        raise HTTPException(status_code=404, detail="Vendor profile not found")
+    
+    async def build():
+        return await db.run_sync(lambda session: inventory_status(session.connection(), vendor_id))
+    
+    version = await db.run_sync(lambda session: inventory_version(session.connection(), vendor_id))
+    return await response_cache.respond(
+        request, "inventory_status", (current_user.id, vendor_id), version, build, tags=[f"vendor:{vendor_id}"]
+    )
+
+@router.get("/export")
+async def export_inventory(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    compress: bool = False,
+    current_user: Principal = Depends(require_role("vendor")),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream the current vendor's full product inventory as NDJSON or CSV, optionally gzipped
+    """
+    vendor_id = await db.scalar(select(VendorProfile.id).where(VendorProfile.user_id == current_user.id))
+    if vendor_id is None:
+        raise HTTPException(status_code=404, detail="Vendor profile not found")
+    
+    query = select(*PRODUCT_EXPORT_COLUMNS).where(Product.vendor_id == vendor_id).order_by(Product.id)
+    return StreamingResponse(
+        stream_export(query, format, compress),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=export_headers("inventory", format, compress)
+    )
+
+@router.get("/alerts")
+async def get_stock_alerts(
+    current_user: Principal = Depends(require_role("vendor")),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Open low-stock alerts for the current vendor's products
+    """
+    vendor_id = await db.scalar(select(VendorProfile.id).where(VendorProfile.user_id == current_user.id))
+    if vendor_id is None:
+        raise HTTPException(status_code=404, detail="Vendor profile not found")
+    
+    alerts = (await db.execute(
+        select(StockAlert.id, StockAlert.product_id, StockAlert.sku, StockAlert.quantity_available,
+               StockAlert.reorder_point, StockAlert.created_at)
+        .where(StockAlert.vendor_id == vendor_id, StockAlert.resolved_at.is_(None))
+        .order_by(StockAlert.created_at.desc(), StockAlert.id.desc())
+    )).all()
+    return {"alerts": [dict(alert._mapping) for alert in alerts]}
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Dict
+from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
+from app.tasks import celery_app
+
+router = APIRouter()
+
+def job_status(job_id: str) -> Dict[str, Any]:
+    """
+    Read a job's state from the result backend; blocking
+    """
+    job = celery_app.AsyncResult(job_id)
+    state = job.state
+    # Unknown ids look the same as jobs still waiting in a queue
+    if state == "PENDING":
+        return {"job_id": job_id, "status": state}
+    
+    status = {
+        "job_id": job_id,
+        "status": state,
+        "task": job.name,
+        "requested_by": (job.kwargs or {}).get("requested_by")
+    }
+    if state == "SUCCESS":
+        status["result"] = job.result
+    elif state == "FAILURE":
+        status["error"] = f"{type(job.result).__name__}: {job.result}"
+    return status
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: str,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Status of a background job, with its result once it has finished
+    """
+    status = await run_in_threadpool(job_status, job_id)
+    
+    # Jobs are visible to whoever started them, and to admins
+    requested_by = status.pop("requested_by", None)
+    if status["status"] != "PENDING" and current_user.role != "admin" and requested_by != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import User, Shipment
+from app.models import Shipment
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.schemas import ShipmentCreate, ShipmentResponse
 
 router = APIRouter()
@@ -10,7 +11,7 @@ router = APIRouter()
 @router.post("/", response_model=ShipmentResponse)
 async def create_shipment(
     shipment: ShipmentCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # Implementation for creating shipments
@@ -19,7 +20,7 @@ async def create_shipment(
 @router.get("/track/{tracking_number}", response_model=ShipmentResponse)
 async def track_shipment(
     tracking_number: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # Implementation for tracking shipments
@@ -1,33 +1,160 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, Order, OrderItem, Product
-from app.routers.auth import get_current_user
-from app.schemas import OrderCreate, OrderResponse
+from app.database import get_async_db, get_db
+from app.models import BuyerProfile, Order, OrderItem, OrderStatus, PaymentStatus, Product, VendorProfile
+from app.routers.auth import get_current_user, require_role
+from app.services.order_import import OrderImportError, import_orders, spool_upload
+from app.services.exports import EXPORT_MEDIA_TYPES, export_headers, stream_export
+from app.services.orders import ORDER_LIST_COLUMNS, InsufficientStock, OrderRejected, list_orders, order_filters, place_order
+from app.services.principal_cache import Principal
+from app.schemas import OrderCreate, OrderPage, OrderResponse
+from app.tasks.imports import import_orders_file
+from datetime import datetime
+from typing import Literal, Optional
+import uuid
 
 router = APIRouter()
 
 @router.post("/", response_model=OrderResponse)
 async def create_order(
     order: OrderCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(require_role("buyer")),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Implementation for creating orders
-    pass
+    buyer_id = await db.scalar(select(BuyerProfile.id).where(BuyerProfile.user_id == current_user.id))
+    if buyer_id is None:
+        raise HTTPException(status_code=404, detail="Buyer profile not found")
+    
+    try:
+        return await place_order(db, buyer_id, order)
+    except InsufficientStock as e:
+        raise HTTPException(status_code=409, detail=e.detail)
+    except OrderRejected as e:
+        raise HTTPException(status_code=400, detail=e.detail)
+
+@router.post("/bulk")
+async def bulk_import_orders(
+    request: Request,
+    response: Response,
+    background: bool = False,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: Principal = Depends(require_role("buyer")),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Import many orders from a CSV (``text/csv``) or NDJSON body
+
+    Rows are validated as the body streams in and loaded in one transaction.
+    Replaying a request with the same ``Idempotency-Key`` header only creates
+    the orders that are still missing. With ``background=true`` the body is
+    spooled and imported by a job; poll ``/api/jobs/{job_id}`` for the summary.
+    """
+    buyer_id = await db.scalar(select(BuyerProfile.id).where(BuyerProfile.user_id == current_user.id))
+    if buyer_id is None:
+        raise HTTPException(status_code=404, detail="Buyer profile not found")
+    idempotency_key = idempotency_key or uuid.uuid4().hex
+    content_type = request.headers.get("content-type", "")
+    
+    if background:
+        path = await spool_upload(request.stream())
+        job = await run_in_threadpool(
+            import_orders_file.delay, buyer_id, idempotency_key, path, content_type, requested_by=current_user.id
+        )
+        response.status_code = 202
+        return {"job_id": job.id, "status": job.status, "idempotency_key": idempotency_key}
+    
+    try:
+        return await import_orders(db, buyer_id, idempotency_key, request.stream(), content_type)
+    except OrderImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except IntegrityError:
+        # Another request with the same key created some of these orders first
+        raise HTTPException(status_code=409, detail="Import with this idempotency key is already in progress")
+
+async def order_scope(current_user: Principal, db: AsyncSession):
+    """
+    Filter limiting orders to the ones the current buyer or vendor is party to
+    """
+    if current_user.role == "buyer":
+        buyer_id = await db.scalar(select(BuyerProfile.id).where(BuyerProfile.user_id == current_user.id))
+        if buyer_id is None:
+            raise HTTPException(status_code=404, detail="Buyer profile not found")
+        return Order.buyer_id == buyer_id
+    if current_user.role == "vendor":
+        vendor_id = await db.scalar(select(VendorProfile.id).where(VendorProfile.user_id == current_user.id))
+        if vendor_id is None:
+            raise HTTPException(status_code=404, detail="Vendor profile not found")
+        return Order.vendor_id == vendor_id
+    raise HTTPException(status_code=403, detail="Access denied")
 
-@router.get("/", response_model=list[OrderResponse])
+@router.get("/", response_model=OrderPage)
 async def get_orders(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    status: Optional[OrderStatus] = None,
+    payment_status: Optional[PaymentStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    include_items: bool = False,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Implementation for getting orders
-    pass
+    """
+    List the current user's orders, newest first
+
+    Pass ``next_cursor`` from a page as ``cursor`` to get the next one.
+    """
+    scope = await order_scope(current_user, db)
+    try:
+        orders, next_cursor = await list_orders(
+            db, scope, limit,
+            cursor=cursor,
+            status=status,
+            payment_status=payment_status,
+            created_from=created_from,
+            created_to=created_to,
+            include_items=include_items
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {"orders": orders, "next_cursor": next_cursor}
+
+@router.get("/export")
+async def export_orders(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    compress: bool = False,
+    status: Optional[OrderStatus] = None,
+    payment_status: Optional[PaymentStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream all of the current user's matching orders as NDJSON or CSV, optionally gzipped
+    """
+    scope = await order_scope(current_user, db)
+    query = (
+        select(*ORDER_LIST_COLUMNS)
+        .where(*order_filters(scope, status, payment_status, created_from, created_to))
+        .order_by(Order.created_at, Order.id)
+    )
+    return StreamingResponse(
+        stream_export(query, format, compress),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers=export_headers("orders", format, compress)
+    )
 
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # Implementation for getting specific order
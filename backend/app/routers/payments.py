@@ -1,14 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import User
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 
 router = APIRouter()
 
 @router.post("/process")
 async def process_payment(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # Implementation for payment processing
@@ -17,7 +17,7 @@ async def process_payment(
 @router.get("/status/{payment_id}")
 async def get_payment_status(
     payment_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # Implementation for payment status
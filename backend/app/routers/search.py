@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+from app.database import get_async_db
+from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
+from app.services.search import search
+
+router = APIRouter()
+
+@router.get("/")
+async def search_catalog(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Literal["products", "vendors"] = "products",
+    category: Optional[str] = None,
+    business_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Search products or vendors by text, most relevant first
+
+    Matches stemmed words in names, SKUs, categories and descriptions, and
+    tolerates typos in product names, SKUs and company names. The first
+    page carries facet counts by category and business_type; pass
+    ``next_cursor`` back as ``cursor`` for the next page.
+    """
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="q must not be blank")
+    if type == "vendors" and category is not None:
+        raise HTTPException(status_code=400, detail="category only applies to product search")
+    
+    try:
+        return await search(
+            db,
+            q,
+            search_type=type,
+            filters={"category": category, "business_type": business_type},
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
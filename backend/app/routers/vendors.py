@@ -1,37 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, VendorProfile
-from app.routers.auth import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models import VendorProfile
+from app.routers.auth import require_role
+from app.services.inventory import create_inventory_summary
+from app.services.principal_cache import Principal
+from app.services.response_cache import response_cache
 from app.schemas import VendorProfileCreate, VendorProfileResponse
+from app.services.supplier_model import supplier_model_registry
 
 router = APIRouter()
 
 @router.get("/profile", response_model=VendorProfileResponse)
 async def get_vendor_profile(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: Principal = Depends(require_role("vendor")),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    if current_user.role != "vendor":
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    vendor_profile = db.query(VendorProfile).filter(VendorProfile.user_id == current_user.id).first()
+    vendor_profile = await db.scalar(select(VendorProfile).where(VendorProfile.user_id == current_user.id))
     if not vendor_profile:
         raise HTTPException(status_code=404, detail="Vendor profile not found")
     
-    return vendor_profile
+    async def build():
+        return VendorProfileResponse.model_validate(vendor_profile)
+    
+    # Answered with 304 until the profile row changes
+    version = (vendor_profile.id, vendor_profile.updated_at or vendor_profile.created_at)
+    return await response_cache.respond(
+        request, "vendor_profile", (current_user.id,), version, build, tags=[f"user:{current_user.id}"]
+    )
 
 @router.post("/profile", response_model=VendorProfileResponse)
 async def create_vendor_profile(
     profile: VendorProfileCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(require_role("vendor")),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    if current_user.role != "vendor":
-        raise HTTPException(status_code=403, detail="Access denied")
-    
     # Check if profile already exists
-    existing_profile = db.query(VendorProfile).filter(VendorProfile.user_id == current_user.id).first()
+    existing_profile = await db.scalar(select(VendorProfile).where(VendorProfile.user_id == current_user.id))
     if existing_profile:
         raise HTTPException(status_code=400, detail="Vendor profile already exists")
     
@@ -40,7 +48,14 @@ async def create_vendor_profile(
         **profile.dict()
     )
     db.add(vendor_profile)
-    db.commit()
-    db.refresh(vendor_profile)
+    await db.flush()
+    # Created with the vendor, so reading the inventory status never writes
+    await db.run_sync(lambda session: create_inventory_summary(session.connection(), vendor_profile.id))
+    await db.commit()
+    await db.refresh(vendor_profile)
+    
+    # Rebuild the supplier model so every worker can match the new vendor
+    supplier_model_registry.vendor_changed(vendor_profile)
+    await run_in_threadpool(response_cache.invalidate, f"user:{current_user.id}")
     
     return vendor_profile
@@ -136,6 +136,26 @@ class OrderResponse(OrderBase):
     class Config:
         from_attributes = True
 
+class OrderSummaryResponse(BaseModel):
+    id: int
+    order_number: str
+    buyer_id: int
+    vendor_id: int
+    status: OrderStatus
+    total_amount: float
+    payment_status: PaymentStatus
+    shipping_address: str
+    notes: Optional[str] = None
+    created_at: datetime
+    order_items: Optional[list[OrderItemResponse]] = None
+    
+    class Config:
+        from_attributes = True
+
+class OrderPage(BaseModel):
+    orders: list[OrderSummaryResponse]
+    next_cursor: Optional[str] = None
+
 # Shipment schemas
 class ShipmentBase(BaseModel):
     tracking_number: Optional[str] = None
@@ -154,3 +174,12 @@ class ShipmentResponse(ShipmentBase):
     
     class Config:
         from_attributes = True
+
+# AI schemas
+class ForecastProductRequest(BaseModel):
+    product_id: Optional[int] = None
+    sku: Optional[str] = None
+    product_category: str = "general"
+    season: int = 1
+    month: int = 1
+    previous_demand: float = 0
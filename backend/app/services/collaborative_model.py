@@ -0,0 +1,181 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Order, OrderStatus
+from app.ai_models.artifacts import ArtifactStore
+from app.ai_models.collaborative import VendorCoOccurrence
+from app.ai_models.supply_chain_ai import SupplyChainAI, ai_service
+from app.services.demand_forecast import MODEL_DIR
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Versioned buyer x vendor collaborative models written by the retraining job
+COLLABORATIVE_MODEL_DIR = os.getenv("COLLABORATIVE_MODEL_DIR", os.path.join(MODEL_DIR, "supplier_collaborative"))
+COLLABORATIVE_KEEP_VERSIONS = int(os.getenv("COLLABORATIVE_KEEP_VERSIONS", "2"))
+# Similar vendors kept per vendor
+COLLABORATIVE_NEIGHBORS = int(os.getenv("COLLABORATIVE_NEIGHBORS", "50"))
+# Share of a recommendation's score that comes from order history (0 to 1)
+COLLABORATIVE_WEIGHT = float(os.getenv("COLLABORATIVE_WEIGHT", "0.3"))
+# New orders trigger a retrain at most this often (seconds)
+COLLABORATIVE_RETRAIN_INTERVAL = float(os.getenv("COLLABORATIVE_RETRAIN_INTERVAL", "3600"))
+# How long a stale model waits for its retraining job before giving up
+COLLABORATIVE_RETRAIN_TIMEOUT = float(os.getenv("COLLABORATIVE_RETRAIN_TIMEOUT", "600"))
+
+# (order count, max order id, last created/updated timestamp)
+OrderWatermark = Tuple[int, Optional[int], Optional[str]]
+
+def order_watermark(db: Session) -> OrderWatermark:
+    """
+    Cheap aggregate that changes whenever an order is placed or changes status
+    """
+    count, max_id, last_change = db.query(
+        func.count(Order.id),
+        func.max(Order.id),
+        func.max(func.coalesce(Order.updated_at, Order.created_at))
+    ).one()
+    return (count, max_id, last_change.isoformat() if last_change else None)
+
+def order_interactions(db: Session) -> Tuple[list, list, list]:
+    """
+    Non-cancelled order counts per (buyer, vendor) pair, aggregated in SQL
+    """
+    rows = db.query(Order.buyer_id, Order.vendor_id, func.count(Order.id)).filter(
+        Order.status != OrderStatus.CANCELLED
+    ).group_by(Order.buyer_id, Order.vendor_id).all()
+    if not rows:
+        return [], [], []
+    buyer_ids, vendor_ids, counts = zip(*rows)
+    return list(buyer_ids), list(vendor_ids), list(counts)
+
+# Global store of collaborative model artifacts
+collaborative_artifacts = ArtifactStore(COLLABORATIVE_MODEL_DIR, keep_versions=COLLABORATIVE_KEEP_VERSIONS)
+
+def build_collaborative_artifact(db: Session, store: ArtifactStore = collaborative_artifacts) -> Tuple[str, OrderWatermark]:
+    """
+    Fit the collaborative model from order history and publish it as a new version
+    """
+    # Read before the orders, so an order racing the build leaves it stale
+    watermark = order_watermark(db)
+    buyer_ids, vendor_ids, counts = order_interactions(db)
+    if not counts:
+        raise ValueError("No orders to build the collaborative model from")
+    model = VendorCoOccurrence(neighbors=COLLABORATIVE_NEIGHBORS)
+    model.fit(buyer_ids, vendor_ids, counts)
+    version = store.publish(model.save, {"watermark": list(watermark)})
+    return version, watermark
+
+def collaborative_artifact_is_current(manifest: dict, watermark: OrderWatermark) -> bool:
+    """
+    Whether a published model covers these orders, or is too recent to retrain yet
+    """
+    age = (datetime.now(timezone.utc) - datetime.fromisoformat(manifest["created_at"])).total_seconds()
+    return tuple(manifest["watermark"]) == watermark or age < COLLABORATIVE_RETRAIN_INTERVAL
+
+class CollaborativeModelRegistry:
+    """
+    Keeps the collaborative model blended into supplier matching current.
+
+    Every ``check_interval`` the newest published version is swapped in.
+    When orders have moved since that version was built, and it is older
+    than COLLABORATIVE_RETRAIN_INTERVAL, a retraining job is queued from a
+    background thread, one at a time. Orders arrive constantly, so
+    retraining on every one would never settle.
+    """
+
+    def __init__(self, ai: SupplyChainAI, check_interval: float = 30.0):
+        self.ai = ai
+        self.check_interval = check_interval
+        self.artifact_version: Optional[str] = None
+        self._manifest: Optional[dict] = None
+        self._checked_at = 0.0
+        self._retraining = False
+        self._lock = threading.Lock()
+
+    def ensure_current(self, db: Optional[Session] = None) -> Optional[str]:
+        """
+        Return the serving model version, queueing a retrain if it is due
+
+        Blocking; without ``db`` a session is opened only when a check is due.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self.artifact_version
+        self._checked_at = now
+
+        self.load_artifact()
+        if db is None:
+            with SessionLocal() as session:
+                self._check_watermark(session)
+        else:
+            self._check_watermark(db)
+        return self.artifact_version
+
+    def _check_watermark(self, db: Session):
+        watermark = order_watermark(db)
+        if watermark[0] == 0:
+            return
+        if self._manifest is not None and collaborative_artifact_is_current(self._manifest, watermark):
+            return
+        self._schedule_retrain()
+
+    def _schedule_retrain(self):
+        with self._lock:
+            if self._retraining:
+                return
+            self._retraining = True
+        threading.Thread(target=self._retrain_in_background, daemon=True).start()
+
+    def _retrain_in_background(self):
+        # The retrain is a job, so a worker can take it off the API process;
+        # run eagerly, it happens on this thread instead of in the request
+        # that noticed the watermark moved
+        from app.tasks.training import retrain_supplier_collaborative
+        try:
+            # only_if_stale skips the work if another worker's run already
+            # published a current version; see SupplierModelRegistry._rebuild_in_background
+            retrain_supplier_collaborative.delay(only_if_stale=True).get(
+                timeout=COLLABORATIVE_RETRAIN_TIMEOUT, disable_sync_subtasks=False
+            )
+            self.load_artifact()
+        except Exception:
+            logger.exception("Collaborative model retraining failed")
+        finally:
+            with self._lock:
+                self._retraining = False
+
+    def load_artifact(self, store: ArtifactStore = collaborative_artifacts) -> bool:
+        """
+        Serve the store's current version, memory-mapped; False if none is published
+
+        A no-op when that version is already being served.
+        """
+        version = store.current_version()
+        if version is None:
+            return False
+        if version == self.artifact_version:
+            return True
+        try:
+            path, manifest = store.open(version)
+            model = VendorCoOccurrence.load(path, manifest)
+        except (OSError, ValueError, KeyError):
+            logger.exception("Could not load collaborative model artifact %s", version)
+            return False
+        self.ai.load_collaborative_model(model, COLLABORATIVE_WEIGHT)
+        self.artifact_version = version
+        self._manifest = manifest
+        logger.info("Collaborative model %s loaded for order watermark %s", version, manifest["watermark"])
+        return True
+
+# Global registry for the shared AI instance
+collaborative_model_registry = CollaborativeModelRegistry(ai_service)
@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session
+
+from app.models import Order, OrderItem, OrderStatus, Product
+
+load_dotenv()
+
+# Order ids below the high-water mark that weren't visible yet are re-checked
+# for this long (seconds), in case their transaction commits late
+DEMAND_GAP_TTL = float(os.getenv("DEMAND_GAP_TTL", "3600"))
+
+# Inclusive (first id, last id, seen since) range of order ids not counted yet
+IdGap = Tuple[int, int, float]
+
+def _missing_ranges(first: int, last: int, seen: List[int]) -> List[Tuple[int, int]]:
+    """
+    Ranges of ids in ``first..last`` that are not in the sorted ``seen``
+    """
+    ranges = []
+    for order_id in seen:
+        if order_id > first:
+            ranges.append((first, order_id - 1))
+        first = order_id + 1
+    if first <= last:
+        ranges.append((first, last))
+    return ranges
+
+class DemandHistory:
+    """
+    Monthly demand per product category, aggregated in the database.
+
+    Totals are kept as a compact ``(product_category, month) -> quantity``
+    series and folded forward from a high-water mark on ``orders.id``, so a
+    refresh only aggregates order lines added since the previous one.
+    Ids are assigned at insert but become visible at commit, so ids below
+    the mark that weren't visible yet are kept as gaps and re-checked for
+    DEMAND_GAP_TTL seconds. Every order is counted once. Orders cancelled
+    after they were counted are not subtracted.
+    """
+
+    def __init__(self):
+        self.high_water_mark = 0
+        self._gaps: List[IdGap] = []
+        self._demand = pd.Series(
+            dtype='int64',
+            index=pd.MultiIndex.from_arrays([[], pd.PeriodIndex([], freq='M')], names=['product_category', 'month'])
+        )
+        self._lock = threading.Lock()
+
+    def refresh(self, db: Session) -> int:
+        """
+        Aggregate orders above the high-water mark or in a gap; returns the orders added
+        """
+        with self._lock:
+            now = time.monotonic()
+            gaps = [gap for gap in self._gaps if now - gap[2] < DEMAND_GAP_TTL]
+            # Fix the upper bound first; ids above it wait for the next refresh
+            upper = db.query(func.max(Order.id)).scalar() or 0
+            if upper <= self.high_water_mark and not gaps:
+                return 0
+
+            scanned = [Order.id.between(first, last) for first, last, _ in gaps]
+            if upper > self.high_water_mark:
+                scanned.append(and_(Order.id > self.high_water_mark, Order.id <= upper))
+
+            # Grouped per order as well, so the same statement tells which ids
+            # are visible; cancelled orders are seen but add no demand
+            product_category = func.coalesce(Product.category, 'general').label('product_category')
+            month_start = func.date_trunc('month', Order.created_at).label('month_start')
+            demand = func.sum(case((Order.status != OrderStatus.CANCELLED, OrderItem.quantity), else_=0))
+            rows = db.query(
+                Order.id,
+                product_category,
+                month_start,
+                demand.label('demand')
+            ).select_from(OrderItem).join(
+                Order, Order.id == OrderItem.order_id
+            ).join(
+                Product, Product.id == OrderItem.product_id
+            ).filter(or_(*scanned)).group_by(Order.id, product_category, month_start).all()
+
+            seen = sorted({row[0] for row in rows})
+            if rows:
+                batch = pd.DataFrame(rows, columns=['order_id', 'product_category', 'month_start', 'demand'])
+                batch['month'] = pd.to_datetime(batch['month_start'], utc=True).dt.tz_convert(None).dt.to_period('M')
+                new_demand = batch.groupby(['product_category', 'month'])['demand'].sum()
+                self._demand = self._demand.add(new_demand, fill_value=0).astype('int64')
+
+            remaining = []
+            for first, last, since in gaps:
+                in_gap = [order_id for order_id in seen if first <= order_id <= last]
+                remaining.extend((start, end, since) for start, end in _missing_ranges(first, last, in_gap))
+            if upper > self.high_water_mark:
+                new = [order_id for order_id in seen if order_id > self.high_water_mark]
+                remaining.extend((start, end, now) for start, end in _missing_ranges(self.high_water_mark + 1, upper, new))
+                self.high_water_mark = upper
+            self._gaps = remaining
+            return len(seen)
+
+    def categories(self) -> List[str]:
+        """
+        Product categories with any recorded demand
+        """
+        with self._lock:
+            demand = self._demand
+        return sorted(demand.index.get_level_values('product_category').unique())
+
+    def monthly_demand(self, product_category: str) -> pd.Series:
+        """
+        Monthly demand for a category, with missing months filled with zero
+        """
+        with self._lock:
+            demand = self._demand
+        if product_category not in demand.index.get_level_values('product_category'):
+            return pd.Series(dtype='int64', index=pd.PeriodIndex([], freq='M'))
+
+        series = demand.xs(product_category, level='product_category').sort_index()
+        months = pd.period_range(series.index.min(), series.index.max(), freq='M')
+        return series.reindex(months, fill_value=0)
+
+    def training_rows(self, product_category: str) -> List[Dict[str, Any]]:
+        """
+        Feature rows for ``SupplyChainAI.train_demand_forecasting``
+        """
+        series = self.monthly_demand(product_category)
+        # Models are per category, so the category feature is constant
+        frame = pd.DataFrame({
+            'product_category': 1,
+            'season': series.index.quarter,
+            'month': series.index.month,
+            'previous_demand': series.shift(1).values,
+            'demand': series.values
+        })
+        return frame.iloc[1:].to_dict('records')
+
+    def next_period_features(self, product_category: str) -> Optional[Dict[str, Any]]:
+        """
+        Features for forecasting the month after the latest observed one
+        """
+        series = self.monthly_demand(product_category)
+        if series.empty:
+            return None
+        next_month = series.index[-1] + 1
+        return {
+            'category': 1,
+            'season': next_month.quarter,
+            'month': next_month.month,
+            'previous_demand': int(series.iloc[-1])
+        }
+
+# Global demand history shared by the forecast models
+demand_history = DemandHistory()
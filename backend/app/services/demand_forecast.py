@@ -0,0 +1,289 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from dotenv import load_dotenv
+
+from app.ai_models.artifacts import ArtifactStore
+from app.ai_models.forest import FlatForest
+from app.ai_models.supply_chain_ai import SupplyChainAI
+from app.database import SessionLocal
+from app.services.demand_features import demand_history
+from app.schemas import ForecastProductRequest
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Forecast model cache settings
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "64"))
+FORECAST_MODEL_TTL = int(os.getenv("FORECAST_MODEL_TTL", "3600"))
+# How often a cached model checks whether another process published a newer version
+FORECAST_VERSION_CHECK_INTERVAL = float(os.getenv("FORECAST_VERSION_CHECK_INTERVAL", "5"))
+FORECAST_KEEP_VERSIONS = int(os.getenv("FORECAST_KEEP_VERSIONS", "2"))
+# How long a stale model waits for its retraining job before giving up
+FORECAST_RETRAIN_TIMEOUT = float(os.getenv("FORECAST_RETRAIN_TIMEOUT", "600"))
+
+def load_demand_history(product_category: str) -> List[Dict[str, Any]]:
+    """
+    Historical demand rows used to train a category's forecast model
+    """
+    db = SessionLocal()
+    try:
+        demand_history.refresh(db)
+    finally:
+        db.close()
+    return demand_history.training_rows(product_category)
+
+class CachedForecastModel(NamedTuple):
+    model: SupplyChainAI
+    # Artifact version being served and when it was published
+    version: str
+    trained_at: float
+    # When this process last compared ``version`` with the store's current one
+    checked_at: float
+    # Features of the month after the latest demand the model was trained on
+    next_period_features: Optional[Dict[str, Any]] = None
+
+class ForecastModelCache:
+    """
+    Per-category demand forecast models with LRU and TTL eviction.
+
+    Each category's model is published to its own versioned artifact store
+    under ``model_dir`` as a memory-mapped ``FlatForest``, so every worker
+    process maps the same pages. Cached entries compare their version with
+    the store's current one every ``version_check_interval`` seconds, so
+    workers converge on whatever version was published last. A miss loads
+    the current version or trains and publishes one. An expired version
+    keeps serving while a retraining job runs, so requests only pay for
+    ``predict`` once a category is warm.
+    """
+
+    def __init__(
+        self,
+        model_dir: str = MODEL_DIR,
+        max_size: int = FORECAST_CACHE_SIZE,
+        ttl: float = FORECAST_MODEL_TTL,
+        version_check_interval: float = FORECAST_VERSION_CHECK_INTERVAL
+    ):
+        self.model_dir = model_dir
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._models: "OrderedDict[str, CachedForecastModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._train_locks: Dict[str, threading.Lock] = {}
+        self._refreshing = set()
+
+    def get(self, product_category: str) -> Optional[SupplyChainAI]:
+        """
+        Return the cached model for a category, or None on a miss
+        """
+        with self._lock:
+            entry = self._models.get(product_category)
+            if entry is None:
+                return None
+            self._models.move_to_end(product_category)
+        now = time.time()
+        if now - entry.checked_at > self.version_check_interval:
+            entry = self._check_version(product_category, entry, now)
+        if now - entry.trained_at > self.ttl:
+            self._schedule_refresh(product_category)
+        return entry.model
+
+    def get_or_load(self, product_category: str) -> SupplyChainAI:
+        """
+        Return a model for a category, loading or training it on a miss
+
+        Blocking; call it from a worker thread, not the event loop.
+        """
+        model = self.get(product_category)
+        if model is not None:
+            return model
+
+        # Only one thread trains a given category at a time
+        with self._train_lock(product_category):
+            model = self.get(product_category)
+            if model is not None:
+                return model
+
+            entry = self._load(product_category)
+            if entry is not None:
+                return entry.model
+            return self.train(product_category)
+
+    def train(self, product_category: str) -> SupplyChainAI:
+        """
+        Train a category's model, publish it as a new version and serve it
+        """
+        model = SupplyChainAI()
+        historical_data = load_demand_history(product_category)
+        # Published with the model, since processes that only load it never
+        # aggregate the demand history themselves
+        next_period_features = demand_history.next_period_features(product_category)
+        # A train/test split needs at least two rows
+        if len(historical_data) >= 2:
+            model.train_demand_forecasting(historical_data)
+
+        def write(directory: str) -> Dict[str, Any]:
+            forest = FlatForest.from_estimator(model.demand_model) if model.is_demand_trained else None
+            return {
+                "product_category": product_category,
+                "trained": forest is not None,
+                "forest": forest.save(directory) if forest is not None else None,
+                "next_period_features": next_period_features
+            }
+
+        version = self.store(product_category).publish(write)
+        # Serve the published arrays, the same pages other workers map
+        return self._load(product_category, version).model
+
+    def retrain(self, product_category: str, max_age: Optional[float] = None) -> SupplyChainAI:
+        """
+        Train a category's model unless another thread is already training it
+
+        With ``max_age``, a version that any process published less than
+        ``max_age`` seconds ago is served instead of training again.
+        """
+        with self._train_lock(product_category):
+            if max_age is not None:
+                entry = self._load(product_category)
+                if entry is not None and time.time() - entry.trained_at < max_age:
+                    return entry.model
+            return self.train(product_category)
+
+    def refresh_all(self):
+        """
+        Retrain every cached category
+        """
+        with self._lock:
+            categories = list(self._models.keys())
+        for product_category in categories:
+            self.retrain(product_category)
+
+    def model_path(self, product_category: str) -> str:
+        slug = re.sub(r'[^A-Za-z0-9_-]+', '_', product_category)[:40]
+        digest = hashlib.sha1(product_category.encode('utf-8')).hexdigest()[:10]
+        return os.path.join(self.model_dir, f"demand_{slug}_{digest}")
+
+    def store(self, product_category: str) -> ArtifactStore:
+        return ArtifactStore(self.model_path(product_category), keep_versions=FORECAST_KEEP_VERSIONS)
+
+    def version(self, product_category: str) -> Optional[str]:
+        """
+        Artifact version this process serves for a category, if cached
+        """
+        with self._lock:
+            entry = self._models.get(product_category)
+        return entry.version if entry is not None else None
+
+    def next_period_features(self, product_category: str) -> Optional[Dict[str, Any]]:
+        """
+        Forecast features published with the cached model for a category, if any
+        """
+        with self._lock:
+            entry = self._models.get(product_category)
+        return entry.next_period_features if entry is not None else None
+
+    def _load(self, product_category: str, version: Optional[str] = None) -> Optional[CachedForecastModel]:
+        store = self.store(product_category)
+        version = version or store.current_version()
+        if version is None:
+            return None
+        path, manifest = store.open(version)
+        model = SupplyChainAI()
+        if manifest["trained"]:
+            model.load_demand_model(FlatForest.load(path, manifest["forest"]))
+        trained_at = datetime.fromisoformat(manifest["created_at"]).timestamp()
+        entry = CachedForecastModel(model, version, trained_at, time.time(), manifest.get("next_period_features"))
+        self._put(product_category, entry)
+        return entry
+
+    def _check_version(self, product_category: str, entry: CachedForecastModel, now: float) -> CachedForecastModel:
+        # A few-byte read; the arrays are only mapped when the version moved
+        try:
+            if self.store(product_category).current_version() not in (None, entry.version):
+                return self._load(product_category) or entry
+        except (OSError, ValueError, KeyError):
+            logger.exception("Could not load the current forecast model for %s", product_category)
+        entry = entry._replace(checked_at=now)
+        self._put(product_category, entry)
+        return entry
+
+    def _put(self, product_category: str, entry: CachedForecastModel):
+        with self._lock:
+            self._models[product_category] = entry
+            self._models.move_to_end(product_category)
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+
+    def _train_lock(self, product_category: str) -> threading.Lock:
+        with self._lock:
+            return self._train_locks.setdefault(product_category, threading.Lock())
+
+    def _schedule_refresh(self, product_category: str):
+        with self._lock:
+            if product_category in self._refreshing:
+                return
+            self._refreshing.add(product_category)
+        threading.Thread(target=self._refresh_in_background, args=(product_category,), daemon=True).start()
+
+    def _refresh_in_background(self, product_category: str):
+        # Retraining is a job, so a worker can take it off the API process.
+        # Every worker's copy expires at the same time; ``max_age`` lets the
+        # jobs after the first one reuse its version instead of training again
+        from app.tasks.training import retrain_demand_models
+        try:
+            # Not a task; see SupplierModelRegistry._rebuild_in_background
+            retrain_demand_models.delay([product_category], max_age=self.ttl).get(
+                timeout=FORECAST_RETRAIN_TIMEOUT, disable_sync_subtasks=False
+            )
+            self._load(product_category)
+        except Exception:
+            logger.exception("Forecast model refresh failed for %s", product_category)
+        finally:
+            with self._lock:
+                self._refreshing.discard(product_category)
+
+# Global forecast model cache
+forecast_models = ForecastModelCache()
+
+def forecast_products(products: List[ForecastProductRequest]) -> List[Dict[str, Any]]:
+    """
+    Forecast a batch of products with one predict call per category model
+
+    Blocking; call it from a worker thread, not the event loop.
+    """
+    positions_by_category: Dict[str, List[int]] = {}
+    for position, product in enumerate(products):
+        positions_by_category.setdefault(product.product_category, []).append(position)
+
+    results: List[Dict[str, Any]] = [None] * len(products)
+    for product_category, positions in positions_by_category.items():
+        model = forecast_models.get_or_load(product_category)
+        # Models are per category, so the category feature is constant here
+        forecasts = model.forecast_demand_batch([
+            {
+                'category': 1,
+                'season': products[position].season,
+                'month': products[position].month,
+                'previous_demand': products[position].previous_demand
+            }
+            for position in positions
+        ])
+        for position, forecast in zip(positions, forecasts):
+            product = products[position]
+            results[position] = {
+                'product_id': product.product_id,
+                'sku': product.sku,
+                'product_category': product_category,
+                'forecast': forecast
+            }
+    return results
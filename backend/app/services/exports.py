@@ -0,0 +1,85 @@
+import csv
+import enum
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, List, Sequence
+
+from dotenv import load_dotenv
+from sqlalchemy import Select
+
+from app.database import AsyncSessionLocal
+
+load_dotenv()
+
+# Rows fetched from the server-side cursor per round-trip
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def _ndjson_lines(columns: Sequence[str], rows: Sequence[tuple]) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, map(_plain, row))), separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+def _csv_lines(writer, buffer: io.StringIO, rows: Sequence[tuple]) -> str:
+    writer.writerows([tuple(map(_plain, row)) for row in rows])
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
+
+def export_headers(name: str, fmt: str, compress: bool) -> dict:
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return headers
+
+async def stream_export(query: Select, fmt: str = "ndjson", compress: bool = False) -> AsyncIterator[bytes]:
+    """
+    Stream a column query as NDJSON or CSV without holding the result set
+
+    Rows come off a server-side cursor in ``EXPORT_BATCH_SIZE`` partitions
+    and are written straight from their tuples. The export uses its own
+    session, since it outlives the request handler.
+    """
+    columns: List[str] = [column["name"] for column in query.column_descriptions]
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor is not None else data
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        yield encode(_csv_lines(writer, buffer, [columns]))
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            if fmt == "csv":
+                chunk = encode(_csv_lines(writer, buffer, rows))
+            else:
+                chunk = encode(_ndjson_lines(columns, rows))
+            if chunk:
+                yield chunk
+
+    if compressor is not None:
+        yield compressor.flush()
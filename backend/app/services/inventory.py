@@ -0,0 +1,228 @@
+import os
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import Connection, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.models import InventorySummary, Product, ProductMovement
+
+load_dotenv()
+
+# Active products at or below this many units (but above zero) count as low stock
+LOW_STOCK_THRESHOLD = int(os.getenv("LOW_STOCK_THRESHOLD", "10"))
+# Days of reservations considered for top movers
+TOP_MOVERS_DAYS = int(os.getenv("TOP_MOVERS_DAYS", "7"))
+TOP_MOVERS_LIMIT = 5
+
+SUMMARY_FIELDS = ("sku_count", "total_units", "total_stock_value", "low_stock_count", "out_of_stock_count")
+
+# (quantity_available, price, is_active) of a product at one point in time
+StockState = Tuple[int, float, bool]
+
+def is_low_stock(quantity: int) -> bool:
+    return 0 < quantity <= LOW_STOCK_THRESHOLD
+
+def _contribution(state: Optional[StockState]) -> Tuple[float, ...]:
+    if state is None:
+        return (0, 0, 0.0, 0, 0)
+    quantity, price, active = state
+    if not active:
+        return (0, 0, 0.0, 0, 0)
+    return (1, quantity, quantity * price, int(is_low_stock(quantity)), int(quantity <= 0))
+
+def summary_delta(before: Optional[StockState], after: Optional[StockState]) -> Dict[str, float]:
+    """
+    Change to a vendor's summary when one product goes from ``before`` to ``after``
+
+    None stands for a product that doesn't exist (yet, or any more).
+    """
+    return {
+        field: new - old
+        for field, new, old in zip(SUMMARY_FIELDS, _contribution(after), _contribution(before))
+    }
+
+def dialect_insert(conn: Connection, model):
+    """
+    INSERT supporting ON CONFLICT for the connection's dialect
+    """
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+def _upsert(conn: Connection, model, values: Dict[str, Any], keys: List[str], set_: Dict[str, Any]):
+    statement = dialect_insert(conn, model).values(**values)
+    conn.execute(statement.on_conflict_do_update(
+        index_elements=keys,
+        set_={key: value(statement.excluded) if callable(value) else value for key, value in set_.items()}
+    ))
+
+def _summary_from_products(conn: Connection, vendor_id: int) -> Dict[str, Any]:
+    row = conn.execute(
+        select(
+            func.count(Product.id),
+            func.coalesce(func.sum(Product.quantity_available), 0),
+            func.coalesce(func.sum(Product.quantity_available * Product.price), 0.0),
+            func.count(Product.id).filter(Product.quantity_available.between(1, LOW_STOCK_THRESHOLD)),
+            func.count(Product.id).filter(Product.quantity_available <= 0)
+        ).where(Product.vendor_id == vendor_id, Product.is_active.is_(True))
+    ).one()
+    return dict(zip(SUMMARY_FIELDS, row))
+
+def create_inventory_summary(conn: Connection, vendor_id: int) -> bool:
+    """
+    Create a vendor's summary from its products unless it exists; True if this call created it
+
+    Vendor profiles get theirs on creation. Never overwrites: a concurrent
+    creator's totals come from its own snapshot, so a loser must apply its
+    change as a delta instead.
+    """
+    statement = dialect_insert(conn, InventorySummary).values(vendor_id=vendor_id, **_summary_from_products(conn, vendor_id))
+    return conn.execute(statement.on_conflict_do_nothing(index_elements=["vendor_id"])).rowcount > 0
+
+def apply_summary_delta(conn: Connection, vendor_id: int, delta: Dict[str, float]):
+    """
+    Add ``delta`` to a vendor's summary, creating it from the products if missing
+    """
+    if not any(delta.values()):
+        return
+    statement = (
+        update(InventorySummary)
+        .where(InventorySummary.vendor_id == vendor_id)
+        .values({getattr(InventorySummary, field): getattr(InventorySummary, field) + change
+                 for field, change in delta.items() if change})
+    )
+    if conn.execute(statement).rowcount == 0 and not create_inventory_summary(conn, vendor_id):
+        # Another transaction created the row first, without this change.
+        # When this call creates it, the products already reflect the change
+        conn.execute(statement)
+
+def record_reservations(conn: Connection, vendor_id: int, reservations: Iterable[Tuple[int, int, int, float]]):
+    """
+    Update the summary and daily movements after stock was reserved
+
+    ``reservations`` holds ``(product_id, quantity, remaining, price)`` for
+    each product decremented by an order. Call it last in the order's
+    transaction, since it locks the vendor's summary row until commit.
+    """
+    totals: Dict[str, float] = defaultdict(float)
+    today = date.today()
+    for product_id, quantity, remaining, price in reservations:
+        for field, change in summary_delta((remaining + quantity, price, True), (remaining, price, True)).items():
+            totals[field] += change
+        _upsert(conn, ProductMovement,
+                {"product_id": product_id, "day": today, "vendor_id": vendor_id, "units": quantity},
+                ["product_id", "day"],
+                {"units": lambda excluded: ProductMovement.units + excluded.units})
+    apply_summary_delta(conn, vendor_id, totals)
+
+def inventory_status(conn: Connection, vendor_id: int) -> Dict[str, Any]:
+    """
+    A vendor's inventory summary and top movers, read from the summary tables
+
+    Read only; a vendor without a summary row yet is summarized from its products.
+    """
+    row = conn.execute(select(InventorySummary).where(InventorySummary.vendor_id == vendor_id)).first()
+    summary = row._asdict() if row is not None else {**_summary_from_products(conn, vendor_id), "updated_at": None}
+
+    units = func.sum(ProductMovement.units).label("units")
+    movers = conn.execute(
+        select(Product.id, Product.sku, Product.name, Product.quantity_available, units)
+        .join(Product, Product.id == ProductMovement.product_id)
+        .where(
+            ProductMovement.vendor_id == vendor_id,
+            ProductMovement.day > date.today() - timedelta(days=TOP_MOVERS_DAYS)
+        )
+        .group_by(Product.id, Product.sku, Product.name, Product.quantity_available)
+        .order_by(units.desc(), Product.id)
+        .limit(TOP_MOVERS_LIMIT)
+    ).all()
+
+    return {
+        "vendor_id": vendor_id,
+        **{field: summary[field] for field in SUMMARY_FIELDS},
+        "total_stock_value": round(summary["total_stock_value"], 2),
+        "low_stock_threshold": LOW_STOCK_THRESHOLD,
+        "top_movers": [
+            {
+                "product_id": mover.id,
+                "sku": mover.sku,
+                "name": mover.name,
+                "units_reserved": int(mover.units),
+                "quantity_available": mover.quantity_available
+            }
+            for mover in movers
+        ],
+        "top_movers_days": TOP_MOVERS_DAYS,
+        "updated_at": summary["updated_at"]
+    }
+
+def inventory_version(conn: Connection, vendor_id: int) -> Tuple[Any, ...]:
+    """
+    Changes whenever ``inventory_status`` for the vendor would
+
+    The summary row moves with every stock change and reservation, the
+    products' last update with renames, and the day with the top movers window.
+    """
+    last_product_change = conn.execute(
+        select(func.max(func.coalesce(Product.updated_at, Product.created_at))).where(Product.vendor_id == vendor_id)
+    ).scalar()
+    row = conn.execute(
+        select(*(getattr(InventorySummary, field) for field in SUMMARY_FIELDS), InventorySummary.updated_at)
+        .where(InventorySummary.vendor_id == vendor_id)
+    ).first()
+    return (tuple(row) if row is not None else None, last_product_change, date.today())
+
+def _product_state(product: Product, committed: bool) -> Tuple[Optional[int], StockState]:
+    # Flushed values, or the values before this flush when ``committed``
+    state = inspect(product)
+
+    def value(attr: str):
+        history = state.attrs[attr].history
+        if committed and history.deleted:
+            return history.deleted[0]
+        if not committed and history.added:
+            return history.added[0]
+        return getattr(product, attr)
+
+    active = value("is_active")
+    return value("vendor_id"), (value("quantity_available") or 0, value("price") or 0.0, active is None or bool(active))
+
+@event.listens_for(Session, "after_flush")
+def _track_product_changes(session: Session, flush_context):
+    # ORM writes to products keep the summaries current; Core UPDATEs on
+    # products (like stock reservations) must call apply_summary_delta
+    deltas: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def add(vendor_id: Optional[int], before: Optional[StockState], after: Optional[StockState]):
+        if vendor_id is None:
+            return
+        for field, change in summary_delta(before, after).items():
+            deltas[vendor_id][field] += change
+
+    for product in session.new:
+        if isinstance(product, Product):
+            vendor_id, after = _product_state(product, committed=False)
+            add(vendor_id, None, after)
+    for product in session.dirty:
+        if isinstance(product, Product) and session.is_modified(product):
+            old_vendor_id, before = _product_state(product, committed=True)
+            vendor_id, after = _product_state(product, committed=False)
+            if old_vendor_id != vendor_id:
+                add(old_vendor_id, before, None)
+                add(vendor_id, None, after)
+            else:
+                add(vendor_id, before, after)
+    for product in session.deleted:
+        if isinstance(product, Product):
+            vendor_id, before = _product_state(product, committed=True)
+            add(vendor_id, before, None)
+
+    if deltas:
+        conn = session.connection()
+        for vendor_id, delta in deltas.items():
+            apply_summary_delta(conn, vendor_id, delta)
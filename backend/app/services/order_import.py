@@ -0,0 +1,374 @@
+import csv
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, Text, and_, delete, exists, func, insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Order, OrderItem, OrderStatus, PaymentStatus, Product
+from app.schemas import OrderCreate
+from app.services.response_cache import response_cache
+
+load_dotenv()
+
+# Rows validated and loaded into staging per batch
+ORDER_IMPORT_CHUNK_SIZE = int(os.getenv("ORDER_IMPORT_CHUNK_SIZE", "5000"))
+# Errors listed in the response; the total is always reported
+ORDER_IMPORT_MAX_ERRORS = int(os.getenv("ORDER_IMPORT_MAX_ERRORS", "1000"))
+# Uploads imported in the background wait here for a worker; workers must share it
+IMPORT_SPOOL_DIR = os.getenv("IMPORT_SPOOL_DIR", "uploads/imports")
+
+CSV_COLUMNS = ["order_ref", "vendor_id", "shipping_address", "notes", "product_id", "quantity", "unit_price"]
+CSV_REQUIRED_COLUMNS = set(CSV_COLUMNS) - {"notes"}
+
+# One staging row per order item; rows of the same order share order_number
+_staging_metadata = MetaData()
+order_import_rows = Table(
+    "order_import_rows", _staging_metadata,
+    Column("line", Integer),
+    Column("order_number", String),
+    Column("order_ref", String),
+    Column("vendor_id", Integer),
+    Column("shipping_address", Text),
+    Column("notes", Text),
+    Column("product_id", Integer),
+    Column("quantity", Integer),
+    Column("unit_price", Float),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP"
+)
+STAGING_COLUMNS = [column.name for column in order_import_rows.columns]
+# Orders rejected while parsing; their staged rows are deleted with a join
+order_import_rejected = Table(
+    "order_import_rejected", _staging_metadata,
+    Column("order_number", String),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP"
+)
+
+class OrderImportError(Exception):
+    """
+    Raised when an import body can't be read at all
+    """
+
+def import_order_number(buyer_id: int, idempotency_key: str, order_ref: str) -> str:
+    """
+    Deterministic order number, so replaying an import skips orders it already created
+    """
+    digest = hashlib.sha1(f"{buyer_id}:{idempotency_key}:{order_ref}".encode("utf-8")).hexdigest()
+    return f"IMP-{digest[:20].upper()}"
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Split a streamed body into numbered lines without buffering all of it
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, _decode_line(line, line_number)
+    if buffer:
+        yield line_number + 1, _decode_line(buffer, line_number + 1)
+
+def _decode_line(line: bytes, line_number: int) -> str:
+    decoded = line.decode("utf-8", errors="replace").rstrip("\r")
+    return decoded.lstrip("\ufeff") if line_number == 1 else decoded
+
+async def iter_csv_records(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[Tuple[int, List[str]]]:
+    # A record continues onto the next line while it has an open quote
+    pending: List[str] = []
+    start = 0
+    async for line_number, line in lines:
+        if not pending:
+            start = line_number
+        pending.append(line)
+        record = "\n".join(pending)
+        if record.count('"') % 2 == 0:
+            pending = []
+            if record.strip():
+                yield start, next(csv.reader([record]))
+    if pending:
+        yield start, next(csv.reader(["\n".join(pending)]))
+
+class OrderImport:
+    """
+    One bulk import: validates rows, stages them and merges them set-wise
+
+    Each order is all or nothing. An order with any invalid row is rejected
+    and its other rows are skipped. Orders already created by an earlier run
+    with the same idempotency key are counted as duplicates.
+    """
+
+    def __init__(self, db: AsyncSession, buyer_id: int, idempotency_key: str):
+        self.db = db
+        self.buyer_id = buyer_id
+        self.idempotency_key = idempotency_key
+        self.rows_read = 0
+        self.error_count = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.rejected: Set[str] = set()
+        self._batch: List[tuple] = []
+        self._rejected_batch: List[tuple] = []
+        self.vendor_ids: List[int] = []
+        self._use_copy = db.bind.dialect.name == "postgresql"
+
+    def error(self, line: int, error: Any, order_ref: Optional[str] = None):
+        self.error_count += 1
+        if len(self.errors) < ORDER_IMPORT_MAX_ERRORS:
+            entry = {"line": line, "error": error}
+            if order_ref is not None:
+                entry["order_ref"] = order_ref
+            self.errors.append(entry)
+
+    async def start(self):
+        conn = await self.db.connection()
+        await conn.run_sync(lambda sync_conn: _staging_metadata.create_all(sync_conn))
+        # Outside PostgreSQL the temp table outlives the transaction
+        await self.db.execute(delete(order_import_rows))
+        await self.db.execute(delete(order_import_rejected))
+
+    async def add(self, line: int, order_ref: str, data: Dict[str, Any]):
+        """
+        Validate one order (or one CSV item row) and queue it for staging
+        """
+        self.rows_read += 1
+        order_number = import_order_number(self.buyer_id, self.idempotency_key, order_ref)
+        try:
+            order = OrderCreate.model_validate(data)
+        except ValidationError as e:
+            self.reject(order_number)
+            self.error(line, e.errors(include_url=False, include_context=False), order_ref)
+            return
+        if not order.order_items or any(item.quantity <= 0 or item.unit_price < 0 for item in order.order_items):
+            self.reject(order_number)
+            self.error(line, "Orders need at least one item with a positive quantity and price", order_ref)
+            return
+
+        for item in order.order_items:
+            self._batch.append((
+                line, order_number, order_ref, order.vendor_id, order.shipping_address, order.notes,
+                item.product_id, item.quantity, item.unit_price
+            ))
+        if len(self._batch) >= ORDER_IMPORT_CHUNK_SIZE:
+            await self.flush()
+
+    def reject(self, order_number: str):
+        if order_number not in self.rejected:
+            self.rejected.add(order_number)
+            self._rejected_batch.append((order_number,))
+
+    async def flush(self):
+        await self._stage(order_import_rows, STAGING_COLUMNS, self._batch)
+        await self._stage(order_import_rejected, ["order_number"], self._rejected_batch)
+        self._batch = []
+        self._rejected_batch = []
+
+    async def _stage(self, table: Table, columns: List[str], records: List[tuple]):
+        if not records:
+            return
+        if self._use_copy:
+            # COPY straight into the staging table over the session's connection
+            conn = await self.db.connection()
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(table.name, records=records, columns=columns)
+        else:
+            await self.db.execute(insert(table), [dict(zip(columns, row)) for row in records])
+
+    async def _reject_where(self, condition_for: Callable[[Table], Any], reason: str):
+        # condition_for builds the filter for a given alias of the staging
+        # table, so the DELETE's subquery doesn't correlate to its target
+        staged = order_import_rows.c
+        rows = (await self.db.execute(
+            select(staged.line, staged.order_ref, staged.order_number)
+            .where(condition_for(order_import_rows))
+            .order_by(staged.line)
+        )).all()
+        for row in rows:
+            if row.order_number not in self.rejected:
+                self.error(row.line, reason, row.order_ref)
+        self.rejected.update(row.order_number for row in rows)
+
+        bad_rows = order_import_rows.alias("bad_rows")
+        await self.db.execute(delete(order_import_rows).where(
+            staged.order_number.in_(select(bad_rows.c.order_number).where(condition_for(bad_rows)))
+        ))
+
+    async def merge(self) -> Dict[str, Any]:
+        """
+        Validate staged rows against the database and insert the good orders
+        """
+        await self.flush()
+        staged = order_import_rows.c
+        if self._use_copy:
+            # Temp tables are never auto-analyzed; give the planner row counts
+            await self.db.execute(text(f"ANALYZE {order_import_rows.name}"))
+            await self.db.execute(text(f"ANALYZE {order_import_rejected.name}"))
+
+        # Rows rejected while parsing take the rest of their order with them
+        if self.rejected:
+            await self.db.execute(delete(order_import_rows).where(
+                exists().where(order_import_rejected.c.order_number == staged.order_number)
+            ))
+
+        # Set-wise checks: unknown products and orders whose rows disagree
+        await self._reject_where(
+            lambda rows: ~exists().where(and_(
+                Product.id == rows.c.product_id,
+                Product.vendor_id == rows.c.vendor_id,
+                Product.is_active.is_(True)
+            )),
+            "Product is not available from this vendor"
+        )
+        order_vendors = order_import_rows.alias("order_vendors")
+        inconsistent = (
+            select(order_vendors.c.order_number)
+            .group_by(order_vendors.c.order_number)
+            .having(func.count(func.distinct(order_vendors.c.vendor_id)) > 1)
+        )
+        await self._reject_where(
+            lambda rows: rows.c.order_number.in_(inconsistent),
+            "Rows for this order disagree on vendor_id"
+        )
+
+        # Orders that an earlier run with the same key already created
+        already_imported = staged.order_number.in_(select(Order.order_number))
+        duplicates = await self.db.scalar(select(func.count(func.distinct(staged.order_number))).where(already_imported))
+        await self.db.execute(delete(order_import_rows).where(already_imported))
+        self.vendor_ids = list(await self.db.scalars(select(staged.vendor_id).distinct()))
+
+        orders_created = (await self.db.execute(insert(Order).from_select(
+            ["order_number", "buyer_id", "vendor_id", "status", "payment_status",
+             "total_amount", "shipping_address", "notes"],
+            select(
+                staged.order_number,
+                literal(self.buyer_id),
+                func.min(staged.vendor_id),
+                literal(OrderStatus.PENDING, Order.status.type),
+                literal(PaymentStatus.PENDING, Order.payment_status.type),
+                func.sum(staged.quantity * staged.unit_price),
+                func.min(staged.shipping_address),
+                func.min(staged.notes)
+            ).group_by(staged.order_number)
+        ))).rowcount
+
+        items_created = (await self.db.execute(insert(OrderItem).from_select(
+            ["order_id", "product_id", "quantity", "unit_price", "total_price"],
+            select(
+                Order.id,
+                staged.product_id,
+                staged.quantity,
+                staged.unit_price,
+                staged.quantity * staged.unit_price
+            ).join(Order, Order.order_number == staged.order_number)
+        ))).rowcount
+
+        return {
+            "idempotency_key": self.idempotency_key,
+            "rows_read": self.rows_read,
+            "orders_created": orders_created,
+            "items_created": items_created,
+            "duplicate_orders": duplicates or 0,
+            "rejected_orders": len(self.rejected),
+            "error_count": self.error_count,
+            "errors": self.errors
+        }
+
+async def import_orders(
+    db: AsyncSession,
+    buyer_id: int,
+    idempotency_key: str,
+    chunks: AsyncIterator[bytes],
+    content_type: str
+) -> Dict[str, Any]:
+    """
+    Bulk-import orders from a streamed CSV or NDJSON body in one transaction
+
+    NDJSON lines are ``OrderCreate`` objects with an optional ``order_ref``;
+    CSV files have one item per row, grouped into orders by ``order_ref``.
+    Imported orders are recorded as placed and don't reserve stock.
+    """
+    job = OrderImport(db, buyer_id, idempotency_key)
+    try:
+        await job.start()
+        if "csv" in content_type:
+            await _read_csv(job, iter_csv_records(iter_lines(chunks)))
+        else:
+            await _read_ndjson(job, iter_lines(chunks))
+        summary = await job.merge()
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    # Drops the cached scoring of every vendor the new orders went to
+    if job.vendor_ids:
+        await run_in_threadpool(response_cache.invalidate, *(f"vendor:{vendor_id}" for vendor_id in job.vendor_ids))
+    return summary
+
+async def spool_upload(chunks: AsyncIterator[bytes]) -> str:
+    """
+    Write a streamed body to a file in ``IMPORT_SPOOL_DIR`` and return its path
+    """
+    os.makedirs(IMPORT_SPOOL_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=IMPORT_SPOOL_DIR, suffix=".upload")
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            async for chunk in chunks:
+                spool.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+async def _read_ndjson(job: OrderImport, lines: AsyncIterator[Tuple[int, str]]):
+    async for line_number, line in lines:
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            job.rows_read += 1
+            job.error(line_number, "Invalid JSON")
+            continue
+        if not isinstance(data, dict):
+            job.rows_read += 1
+            job.error(line_number, "Each line must be a JSON object")
+            continue
+        order_ref = str(data.pop("order_ref", None) or f"line:{line_number}")
+        await job.add(line_number, order_ref, data)
+
+async def _read_csv(job: OrderImport, records: AsyncIterator[Tuple[int, List[str]]]):
+    header: Optional[List[str]] = None
+    async for line_number, record in records:
+        if header is None:
+            header = [name.strip() for name in record]
+            missing = CSV_REQUIRED_COLUMNS - set(header)
+            if missing:
+                raise OrderImportError(f"CSV header is missing columns: {', '.join(sorted(missing))}")
+            continue
+        row = dict(zip(header, record))
+        order_ref = (row.get("order_ref") or "").strip()
+        if not order_ref:
+            job.rows_read += 1
+            job.error(line_number, "order_ref is required")
+            continue
+        await job.add(line_number, order_ref, {
+            "vendor_id": row.get("vendor_id"),
+            "shipping_address": row.get("shipping_address"),
+            "notes": row.get("notes") or None,
+            "order_items": [{
+                "product_id": row.get("product_id"),
+                "quantity": row.get("quantity"),
+                "unit_price": row.get("unit_price")
+            }]
+        })
+    if header is None:
+        raise OrderImportError("CSV body is empty")
@@ -0,0 +1,202 @@
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import Order, OrderItem, OrderStatus, PaymentStatus, Product
+from app.schemas import OrderCreate
+from app.services.inventory import record_reservations
+from app.services.stock_alerts import stock_alert_engine
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.response_cache import response_cache
+
+class OrderRejected(Exception):
+    """
+    Raised when an order can't be placed; ``detail`` is safe to return to the client
+    """
+
+    def __init__(self, detail):
+        super().__init__(detail)
+        self.detail = detail
+
+class InsufficientStock(OrderRejected):
+    """
+    Raised when one or more products can't cover the requested quantity
+    """
+
+def new_order_number() -> str:
+    return f"ORD-{datetime.utcnow():%Y%m%d}-{uuid.uuid4().hex[:12].upper()}"
+
+def _requested_quantities(order: OrderCreate) -> Dict[int, int]:
+    quantities: Dict[int, int] = defaultdict(int)
+    for item in order.order_items:
+        if item.quantity <= 0:
+            raise OrderRejected(f"Quantity for product {item.product_id} must be positive")
+        quantities[item.product_id] += item.quantity
+    if not quantities:
+        raise OrderRejected("Order has no items")
+    return quantities
+
+async def _explain_rejection(db: AsyncSession, vendor_id: int, product_id: int, quantity: int) -> OrderRejected:
+    # Only runs on the failure path to tell the buyer why the reservation missed
+    product = (await db.execute(
+        select(Product.vendor_id, Product.is_active, Product.quantity_available, Product.minimum_order_quantity)
+        .where(Product.id == product_id)
+    )).first()
+    if product is None or product.vendor_id != vendor_id or not product.is_active:
+        return OrderRejected(f"Product {product_id} is not available from this vendor")
+    if quantity < (product.minimum_order_quantity or 1):
+        return OrderRejected(f"Product {product_id} requires a minimum order of {product.minimum_order_quantity}")
+    return InsufficientStock({
+        "message": "Insufficient stock",
+        "product_id": product_id,
+        "requested": quantity,
+        "available": product.quantity_available
+    })
+
+async def place_order(db: AsyncSession, buyer_id: int, order: OrderCreate) -> Order:
+    """
+    Reserve stock and insert an order with its items in one transaction
+
+    Each product is decremented with a conditional UPDATE, so concurrent
+    orders can never oversell. Items are priced from the product row the
+    UPDATE returns, not from the request.
+    """
+    quantities = _requested_quantities(order)
+
+    try:
+        # Reserve in product id order so concurrent orders lock rows in the
+        # same sequence and can't deadlock each other
+        prices: Dict[int, float] = {}
+        reservations = []
+        for product_id in sorted(quantities):
+            quantity = quantities[product_id]
+            reserved = (await db.execute(
+                update(Product)
+                .where(
+                    Product.id == product_id,
+                    Product.vendor_id == order.vendor_id,
+                    Product.is_active.is_(True),
+                    func.coalesce(Product.minimum_order_quantity, 1) <= quantity,
+                    Product.quantity_available >= quantity
+                )
+                .values(quantity_available=Product.quantity_available - quantity)
+                .returning(Product.price, Product.quantity_available)
+            )).first()
+            if reserved is None:
+                raise await _explain_rejection(db, order.vendor_id, product_id, quantity)
+            prices[product_id] = reserved.price
+            reservations.append((product_id, quantity, reserved.quantity_available, reserved.price))
+
+        items: List[dict] = []
+        for item in order.order_items:
+            items.append({
+                'product_id': item.product_id,
+                'quantity': item.quantity,
+                'unit_price': prices[item.product_id],
+                'total_price': prices[item.product_id] * item.quantity
+            })
+
+        db_order = await db.scalar(
+            insert(Order)
+            .values(
+                order_number=new_order_number(),
+                buyer_id=buyer_id,
+                vendor_id=order.vendor_id,
+                status=OrderStatus.PENDING,
+                payment_status=PaymentStatus.PENDING,
+                total_amount=sum(item['total_price'] for item in items),
+                shipping_address=order.shipping_address,
+                notes=order.notes
+            )
+            .returning(Order)
+        )
+
+        # All items go out as a single multi-row INSERT ... RETURNING
+        for item in items:
+            item['order_id'] = db_order.id
+        db_items = list(await db.scalars(insert(OrderItem).returning(OrderItem), items))
+
+        # Last before commit: this locks the vendor's inventory summary row
+        await db.run_sync(lambda session: record_reservations(session.connection(), order.vendor_id, reservations))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    stock_alert_engine.products_changed(quantities)
+    # Drops the vendor's cached scoring and inventory status
+    await run_in_threadpool(response_cache.invalidate, f"vendor:{order.vendor_id}")
+    set_committed_value(db_order, 'order_items', db_items)
+    return db_order
+
+# Columns returned by the order listing
+ORDER_LIST_COLUMNS = (
+    Order.id, Order.order_number, Order.buyer_id, Order.vendor_id, Order.status, Order.total_amount,
+    Order.payment_status, Order.shipping_address, Order.notes, Order.created_at
+)
+
+def order_filters(
+    scope,
+    status: Optional[OrderStatus] = None,
+    payment_status: Optional[PaymentStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None
+) -> list:
+    filters = [scope]
+    if status is not None:
+        filters.append(Order.status == status)
+    if payment_status is not None:
+        filters.append(Order.payment_status == payment_status)
+    if created_from is not None:
+        filters.append(Order.created_at >= created_from)
+    if created_to is not None:
+        filters.append(Order.created_at < created_to)
+    return filters
+
+async def list_orders(
+    db: AsyncSession,
+    scope,
+    limit: int,
+    cursor: Optional[str] = None,
+    status: Optional[OrderStatus] = None,
+    payment_status: Optional[PaymentStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    include_items: bool = False
+) -> Tuple[list, Optional[str]]:
+    """
+    One page of orders, newest first, and the cursor for the next page
+
+    ``scope`` restricts the listing, e.g. ``Order.vendor_id == 3``. Pages are
+    keyed on ``(created_at, id)`` so any page costs one index range scan no
+    matter how deep it is. Without ``include_items`` only order columns are
+    read; with it items are loaded in one extra IN query for the whole page.
+    """
+    filters = order_filters(scope, status, payment_status, created_from, created_to)
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        try:
+            last_created_at, last_id = datetime.fromisoformat(values[0]), int(values[1])
+        except (IndexError, TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        filters.append(tuple_(Order.created_at, Order.id) < tuple_(last_created_at, last_id))
+
+    order_by = (Order.created_at.desc(), Order.id.desc())
+    if include_items:
+        query = select(Order).options(load_only(*ORDER_LIST_COLUMNS), selectinload(Order.order_items))
+        rows = list(await db.scalars(query.where(*filters).order_by(*order_by).limit(limit + 1)))
+    else:
+        rows = (await db.execute(select(*ORDER_LIST_COLUMNS).where(*filters).order_by(*order_by).limit(limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
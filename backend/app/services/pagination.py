@@ -0,0 +1,25 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Opaque keyset cursor for the sort key of the last row on a page
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Inverse of ``encode_cursor``; datetimes come back as ISO strings
+
+    Raises ValueError for anything that isn't a cursor we issued.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(payload, list):
+        raise ValueError("Invalid cursor")
+    return payload
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHash, VerificationError
+from dotenv import load_dotenv
+
+from app.database import AsyncSessionLocal
+from app.metrics import Counter, Gauge, Histogram
+from app.models import User
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# Argon2 cost parameters; raising them takes effect for existing users on
+# their next login through check_needs_rehash
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+# Hashing runs on a dedicated pool so a login burst can't starve the event
+# loop or the default threadpool; work beyond MAX_PENDING is rejected
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+ph = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM
+)
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+_pending = 0
+
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending", "Password hash operations queued or running"
+)
+PASSWORD_HASH_QUEUE_SECONDS = Histogram(
+    "password_hash_queue_seconds", "Time password hash operations waited for a worker", ["operation"]
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds", "Time spent computing password hashes", ["operation"]
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Password hash operations rejected because the queue was full", ["operation"]
+)
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when the password hashing queue is full
+    """
+
+async def _run(operation: str, fn: Callable[..., T], *args) -> T:
+    global _pending
+    # Only touched from the event loop, so no lock is needed
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        PASSWORD_HASH_REJECTED.inc(operation=operation)
+        raise PasswordHasherBusy()
+    _pending += 1
+    PASSWORD_HASH_PENDING.set(_pending)
+
+    enqueued_at = time.perf_counter()
+
+    def job() -> T:
+        started_at = time.perf_counter()
+        PASSWORD_HASH_QUEUE_SECONDS.observe(started_at - enqueued_at, operation=operation)
+        try:
+            return fn(*args)
+        finally:
+            PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started_at, operation=operation)
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, job)
+    finally:
+        _pending -= 1
+        PASSWORD_HASH_PENDING.set(_pending)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return ph.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHash):
+        return False
+
+async def hash_password(password) -> str:
+    """
+    Hash a password with Argon2 off the event loop
+    """
+    # Ensure password is a string
+    if isinstance(password, bytes):
+        password = password.decode('utf-8')
+
+    # Ensure password is not None or empty
+    if not password:
+        raise ValueError("Password cannot be empty")
+
+    return await _run("hash", ph.hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against its Argon2 hash off the event loop
+    """
+    return await _run("verify", _verify, plain_password, hashed_password)
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Whether a stored hash was made with different cost parameters
+
+    Only parses the hash's parameter string, so it is cheap to call inline.
+    """
+    try:
+        return ph.check_needs_rehash(hashed_password)
+    except InvalidHash:
+        return False
+
+async def rehash_password(user_id: int, plain_password: str):
+    """
+    Re-hash a user's password with the current parameters
+
+    Meant to run as a background task after a successful login.
+    """
+    try:
+        hashed_password = await hash_password(plain_password)
+    except PasswordHasherBusy:
+        # Try again on a later login
+        return
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
+        if user is not None:
+            user.hashed_password = hashed_password
+            await db.commit()
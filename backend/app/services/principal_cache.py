@@ -0,0 +1,167 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.metrics import Counter
+from app.models import User
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Principal cache settings; the TTL bounds how long another worker can keep
+# serving a principal after it was invalidated elsewhere
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_REDIS_URL = os.getenv("PRINCIPAL_CACHE_REDIS_URL")
+
+PRINCIPAL_CACHE_REQUESTS = Counter(
+    "principal_cache_requests_total", "Authenticated principal lookups by cache result", ["result"]
+)
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated user fields request handlers need
+    """
+    id: int
+    username: str
+    role: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, username=user.username, role=user.role, is_active=bool(user.is_active))
+
+class PrincipalCache:
+    """
+    Short-TTL LRU of authenticated principals keyed by user id, optionally
+    backed by Redis so workers share entries and invalidations
+    """
+
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL, max_size: int = PRINCIPAL_CACHE_SIZE, redis_url: Optional[str] = PRINCIPAL_CACHE_REDIS_URL):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_sync = None
+        # Redis deletes queued on the event loop, kept until they finish
+        self._pending = set()
+        if redis_url:
+            import redis
+            import redis.asyncio
+            self._redis = redis.asyncio.Redis.from_url(redis_url)
+            self._redis_sync = redis.Redis.from_url(redis_url)
+
+    async def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                principal, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    PRINCIPAL_CACHE_REQUESTS.inc(result="hit")
+                    return principal
+                del self._entries[user_id]
+
+        if self._redis is not None:
+            try:
+                cached = await self._redis.get(self._key(user_id))
+            except Exception:
+                logger.warning("Principal cache Redis read failed", exc_info=True)
+                cached = None
+            if cached is not None:
+                principal = Principal(**json.loads(cached))
+                self._put_local(principal)
+                PRINCIPAL_CACHE_REQUESTS.inc(result="redis_hit")
+                return principal
+
+        PRINCIPAL_CACHE_REQUESTS.inc(result="miss")
+        return None
+
+    async def put(self, principal: Principal):
+        self._put_local(principal)
+        if self._redis is not None:
+            try:
+                await self._redis.set(self._key(principal.id), json.dumps(asdict(principal)), ex=max(1, int(self.ttl)))
+            except Exception:
+                logger.warning("Principal cache Redis write failed", exc_info=True)
+
+    def invalidate(self, *user_ids: int):
+        """
+        Drop principals so the next request reloads them from the database
+
+        On an event loop thread the Redis delete is queued on the loop
+        instead of blocking it.
+        """
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+        if self._redis is None or not user_ids:
+            return
+        keys = [self._key(user_id) for user_id in user_ids]
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            try:
+                self._redis_sync.delete(*keys)
+            except Exception:
+                logger.warning("Principal cache Redis invalidation failed", exc_info=True)
+            return
+        task = loop.create_task(self._delete(keys))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _delete(self, keys: list):
+        try:
+            await self._redis.delete(*keys)
+        except Exception:
+            logger.warning("Principal cache Redis invalidation failed", exc_info=True)
+
+    def _put_local(self, principal: Principal):
+        with self._lock:
+            self._entries[principal.id] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"principal:{user_id}"
+
+# Global principal cache
+principal_cache = PrincipalCache()
+
+@event.listens_for(User, "after_update")
+def _collect_changed_principal(mapper, connection, target: User):
+    # Role and active flag are what cached principals are trusted for. Bulk
+    # UPDATE statements bypass this hook and must invalidate explicitly.
+    # Invalidated after commit, so a concurrent request can't re-cache the
+    # old values between the flush and the commit
+    state = inspect(target)
+    session = object_session(target)
+    if session is not None and (state.attrs.role.history.has_changes() or state.attrs.is_active.history.has_changes()):
+        session.info.setdefault("changed_principals", set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_principals(session: Session):
+    changed = session.info.pop("changed_principals", None)
+    if changed:
+        principal_cache.invalidate(*changed)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_principals(session: Session):
+    session.info.pop("changed_principals", None)
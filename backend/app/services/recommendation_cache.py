@@ -0,0 +1,186 @@
+import hashlib
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.ai_models.supplier_index import profile_text
+from app.ai_models.supply_chain_ai import SupplyChainAI, ai_service
+from app.models import BuyerProfile, BuyerRecommendation
+from app.services.collaborative_model import CollaborativeModelRegistry, collaborative_model_registry
+from app.services.inventory import dialect_insert
+from app.services.supplier_model import SupplierModelRegistry, supplier_model_registry
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Recommendations kept per buyer
+RECOMMENDATION_TOP_N = int(os.getenv("RECOMMENDATION_TOP_N", "5"))
+# Buyers matched per batch (one sparse matrix product) in a refresh
+RECOMMENDATION_REFRESH_BATCH_SIZE = int(os.getenv("RECOMMENDATION_REFRESH_BATCH_SIZE", "512"))
+
+def buyer_to_profile_data(buyer: BuyerProfile) -> dict:
+    """
+    Convert a buyer profile to the format expected by the AI service
+    """
+    return {
+        'id': buyer.id,
+        'company_name': buyer.company_name,
+        'business_type': buyer.business_type,
+        'description': buyer.description
+    }
+
+def profile_fingerprint(profile: Dict[str, Any]) -> str:
+    """
+    Changes whenever the text the buyer is matched on changes
+    """
+    return hashlib.sha256(profile_text(profile).encode()).hexdigest()
+
+def recommendation_model_version(
+    registry: SupplierModelRegistry = supplier_model_registry,
+    collaborative: CollaborativeModelRegistry = collaborative_model_registry
+) -> Optional[str]:
+    """
+    Versions of the models recommendations are computed with; None before a supplier model exists
+    """
+    if registry.artifact_version is None:
+        return None
+    if collaborative.artifact_version is None:
+        return registry.artifact_version
+    return f"{registry.artifact_version}+{collaborative.artifact_version}"
+
+def _upsert_statement(bind, rows: List[Dict[str, Any]]):
+    statement = dialect_insert(bind, BuyerRecommendation).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=["buyer_id"],
+        set_={
+            "model_version": statement.excluded.model_version,
+            "profile_fingerprint": statement.excluded.profile_fingerprint,
+            "recommendations": statement.excluded.recommendations,
+            "computed_at": datetime.now(timezone.utc)
+        }
+    )
+
+def refresh_recommendation_cache(
+    db: Session,
+    buyer_ids: Optional[List[int]] = None,
+    ai: SupplyChainAI = ai_service,
+    registry: SupplierModelRegistry = supplier_model_registry,
+    collaborative: CollaborativeModelRegistry = collaborative_model_registry
+) -> Dict[str, Any]:
+    """
+    Recompute cached recommendations that are missing or out of date
+
+    Serves the newest published supplier and collaborative models first.
+    Buyers whose cached entry already matches both their profile and those
+    model versions are skipped; the rest are matched in batches and
+    upserted. Every buyer is considered when ``buyer_ids`` is None.
+    """
+    registry.load_artifact()
+    collaborative.load_artifact()
+    model_version = recommendation_model_version(registry, collaborative)
+    if model_version is None:
+        return {"model_version": None, "refreshed": 0, "checked": 0}
+
+    refreshed = checked = 0
+    last_id = 0
+    while True:
+        # Keyset batches, so the whole buyer table is never loaded at once
+        query = (
+            db.query(BuyerProfile, BuyerRecommendation.model_version, BuyerRecommendation.profile_fingerprint)
+            .outerjoin(BuyerRecommendation, BuyerRecommendation.buyer_id == BuyerProfile.id)
+            .filter(BuyerProfile.id > last_id)
+        )
+        if buyer_ids is not None:
+            query = query.filter(BuyerProfile.id.in_(buyer_ids))
+        batch = query.order_by(BuyerProfile.id).limit(RECOMMENDATION_REFRESH_BATCH_SIZE).all()
+        if not batch:
+            break
+        last_id = batch[-1][0].id
+        checked += len(batch)
+
+        stale = []
+        for buyer, cached_version, cached_fingerprint in batch:
+            profile = buyer_to_profile_data(buyer)
+            fingerprint = profile_fingerprint(profile)
+            if cached_version != model_version or cached_fingerprint != fingerprint:
+                stale.append((buyer.id, profile, fingerprint))
+        if not stale:
+            continue
+
+        matches = ai.get_supplier_recommendations_batch([profile for _, profile, _ in stale], top_n=RECOMMENDATION_TOP_N)
+        db.execute(_upsert_statement(db.get_bind(), [
+            {
+                "buyer_id": buyer_id,
+                "model_version": model_version,
+                "profile_fingerprint": fingerprint,
+                "recommendations": recommendations
+            }
+            for (buyer_id, _, fingerprint), recommendations in zip(stale, matches)
+        ]))
+        db.commit()
+        refreshed += len(stale)
+
+    return {"model_version": model_version, "refreshed": refreshed, "checked": checked}
+
+def schedule_recommendation_refresh(buyer_ids: Optional[List[int]] = None):
+    """
+    Queue a refresh of cached recommendations, for all buyers by default
+
+    Best effort: a failed dispatch leaves entries stale until the next refresh.
+    """
+    # Imported here since the task module imports this one
+    from app.tasks.recommendations import refresh_buyer_recommendations
+    try:
+        refresh_buyer_recommendations.delay(buyer_ids=buyer_ids)
+    except Exception:
+        logger.exception("Failed to dispatch recommendation refresh")
+
+async def buyer_recommendations(
+    db: AsyncSession,
+    buyer: BuyerProfile,
+    ai: SupplyChainAI = ai_service,
+    registry: SupplierModelRegistry = supplier_model_registry,
+    collaborative: CollaborativeModelRegistry = collaborative_model_registry
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Recommendations for a buyer and how fresh they are
+
+    A cached entry for the buyer's current profile is served as a ``hit``,
+    or as ``stale`` when it was computed with an older model version (the
+    caller should schedule a refresh). Anything else is a ``miss``: it is
+    computed live and written back for next time.
+    """
+    profile = buyer_to_profile_data(buyer)
+    fingerprint = profile_fingerprint(profile)
+    model_version = recommendation_model_version(registry, collaborative)
+
+    cached = await db.get(BuyerRecommendation, buyer.id)
+    if cached is not None and cached.profile_fingerprint == fingerprint:
+        return cached.recommendations, {
+            "status": "hit" if cached.model_version == model_version else "stale",
+            "model_version": cached.model_version,
+            "computed_at": cached.computed_at
+        }
+
+    # Index search and scoring are CPU-bound; keep them off the event loop
+    recommendations = await run_in_threadpool(ai.get_supplier_recommendations, profile, top_n=RECOMMENDATION_TOP_N)
+    if model_version is not None:
+        await db.execute(_upsert_statement(db.bind, [{
+            "buyer_id": buyer.id,
+            "model_version": model_version,
+            "profile_fingerprint": fingerprint,
+            "recommendations": recommendations
+        }]))
+        await db.commit()
+    return recommendations, {
+        "status": "miss",
+        "model_version": model_version,
+        "computed_at": datetime.now(timezone.utc)
+    }
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.metrics import Counter
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Rendered GET responses kept per process; set a Redis URL to share them
+# between workers
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "5000"))
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL")
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total", "Cached GET responses by endpoint and cache result", ["endpoint", "result"]
+)
+
+# Clients revalidate every time; the ETag makes that a cheap 304
+CACHE_CONTROL = "private, no-cache"
+
+def response_etag(endpoint: str, key: Iterable[Any], version: Any) -> str:
+    """
+    Weak ETag for one endpoint's response to one user and set of parameters at a data version
+    """
+    payload = json.dumps([endpoint, list(key), version], default=str, separators=(",", ":"))
+    return f'W/"{hashlib.sha256(payload.encode()).hexdigest()[:32]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an ``If-None-Match`` header against an ETag
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+class ResponseCache:
+    """
+    Rendered JSON bodies of read-heavy GET endpoints, validated by ETag.
+
+    The caller derives a version from the rows or model the response is
+    built from (``updated_at`` values, counts, artifact versions), which is
+    far cheaper than building the response. The ETag hashes that version
+    with the endpoint, user and parameters. A matching ``If-None-Match`` is
+    answered with 304. Otherwise a cached body is only served while its
+    ETag is still the current one, so a stale entry can never be returned.
+    Entries carry tags that write handlers invalidate explicitly; this
+    frees them straight away, locally and in Redis.
+    """
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_size: int = RESPONSE_CACHE_SIZE, redis_url: Optional[str] = RESPONSE_CACHE_REDIS_URL):
+        self.ttl = ttl
+        self.max_size = max_size
+        # key -> (etag, body, tags, expires_at)
+        self._entries: "OrderedDict[str, Tuple[str, bytes, Tuple[str, ...], float]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_sync = None
+        if redis_url:
+            import redis
+            import redis.asyncio
+            self._redis = redis.asyncio.Redis.from_url(redis_url)
+            self._redis_sync = redis.Redis.from_url(redis_url)
+
+    async def respond(
+        self,
+        request: Request,
+        endpoint: str,
+        key: Tuple[Any, ...],
+        version: Any,
+        build: Callable[[], Awaitable[Any]],
+        tags: Iterable[str] = ()
+    ) -> Response:
+        """
+        304, cached body or freshly built body for a GET, with its ETag
+
+        ``key`` identifies the user and parameters, ``version`` the data the
+        response is built from and ``build`` renders it on a miss.
+        """
+        etag = response_etag(endpoint, key, version)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            RESPONSE_CACHE_REQUESTS.inc(endpoint=endpoint, result="not_modified")
+            return Response(status_code=304, headers=headers)
+
+        cache_key = self._key(endpoint, key)
+        body, result = await self.get(cache_key, etag)
+        if body is None:
+            body = JSONResponse(jsonable_encoder(await build())).body
+            await self.put(cache_key, etag, body, tuple(tags))
+        RESPONSE_CACHE_REQUESTS.inc(endpoint=endpoint, result=result)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def get(self, cache_key: str, etag: str) -> Tuple[Optional[bytes], str]:
+        """
+        The cached body if it was rendered for ``etag``, and the cache result
+        """
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                cached_etag, body, _, expires_at = entry
+                if expires_at > time.monotonic() and cached_etag == etag:
+                    self._entries.move_to_end(cache_key)
+                    return body, "hit"
+                self._drop_local(cache_key)
+
+        if self._redis is not None:
+            try:
+                cached = await self._redis.get(cache_key)
+            except Exception:
+                logger.warning("Response cache Redis read failed", exc_info=True)
+                cached = None
+            if cached is not None:
+                entry = json.loads(cached)
+                if entry["etag"] == etag:
+                    body = entry["body"].encode()
+                    self._put_local(cache_key, etag, body, tuple(entry["tags"]))
+                    return body, "redis_hit"
+
+        return None, "miss"
+
+    async def put(self, cache_key: str, etag: str, body: bytes, tags: Tuple[str, ...] = ()):
+        self._put_local(cache_key, etag, body, tags)
+        if self._redis is not None:
+            ttl = max(1, int(self.ttl))
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    pipe.set(cache_key, json.dumps({"etag": etag, "body": body.decode(), "tags": list(tags)}), ex=ttl)
+                    for tag in tags:
+                        pipe.sadd(self._tag_key(tag), cache_key)
+                        pipe.expire(self._tag_key(tag), ttl)
+                    await pipe.execute()
+            except Exception:
+                logger.warning("Response cache Redis write failed", exc_info=True)
+
+    def invalidate(self, *tags: str):
+        """
+        Drop every response tagged with any of ``tags``
+
+        Blocking when Redis is configured; call it from a worker thread in async code.
+        """
+        with self._lock:
+            for tag in tags:
+                for cache_key in list(self._tags.get(tag, ())):
+                    self._drop_local(cache_key)
+        if self._redis_sync is not None:
+            try:
+                for tag in tags:
+                    cache_keys = self._redis_sync.smembers(self._tag_key(tag))
+                    self._redis_sync.delete(self._tag_key(tag), *cache_keys)
+            except Exception:
+                logger.warning("Response cache Redis invalidation failed", exc_info=True)
+
+    def _put_local(self, cache_key: str, etag: str, body: bytes, tags: Tuple[str, ...]):
+        with self._lock:
+            self._drop_local(cache_key)
+            self._entries[cache_key] = (etag, body, tags, time.monotonic() + self.ttl)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(cache_key)
+            while len(self._entries) > self.max_size:
+                self._drop_local(next(iter(self._entries)))
+
+    def _drop_local(self, cache_key: str):
+        # Callers hold the lock
+        entry = self._entries.pop(cache_key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(cache_key)
+                if not keys:
+                    del self._tags[tag]
+
+    @staticmethod
+    def _key(endpoint: str, key: Tuple[Any, ...]) -> str:
+        return f"response:{endpoint}:" + ":".join(str(part) for part in key)
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"response-tag:{tag}"
+
+# Global response cache
+response_cache = ResponseCache()
@@ -0,0 +1,161 @@
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import Float, and_, cast, func, literal, literal_column, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Product, VendorProfile
+from app.services.pagination import decode_cursor, encode_cursor
+
+load_dotenv()
+
+# Values listed per facet on the first page of results
+SEARCH_FACET_LIMIT = int(os.getenv("SEARCH_FACET_LIMIT", "20"))
+
+class SearchTarget:
+    """
+    Where one search type looks: its table, text fields and result columns
+    """
+
+    def __init__(self, model, text_columns, fuzzy_columns, prefix_columns, columns, facets, filters):
+        self.model = model
+        # Fallback matching outside PostgreSQL
+        self.text_columns = text_columns
+        # Trigram-indexed columns for typo-tolerant matches
+        self.fuzzy_columns = fuzzy_columns
+        # Codes matched by prefix, which the trigram indexes also serve
+        self.prefix_columns = prefix_columns
+        self.columns = columns
+        # facet name -> column it counts
+        self.facets = facets
+        # filter name -> column it restricts
+        self.filters = filters
+        self.search_vector = literal_column(f"{model.__tablename__}.search_vector", TSVECTOR)
+
+SEARCH_TARGETS = {
+    "products": SearchTarget(
+        Product,
+        text_columns=(Product.name, Product.sku, Product.category, Product.description),
+        fuzzy_columns=(Product.name, Product.sku),
+        prefix_columns=(Product.sku,),
+        columns=(
+            Product.id, Product.name, Product.sku, Product.category, Product.price, Product.unit,
+            Product.quantity_available, Product.vendor_id, VendorProfile.company_name.label("vendor_name")
+        ),
+        facets={"category": Product.category, "business_type": VendorProfile.business_type},
+        filters={"category": Product.category, "business_type": VendorProfile.business_type}
+    ),
+    "vendors": SearchTarget(
+        VendorProfile,
+        text_columns=(VendorProfile.company_name, VendorProfile.business_type, VendorProfile.description),
+        fuzzy_columns=(VendorProfile.company_name,),
+        prefix_columns=(),
+        columns=(
+            VendorProfile.id, VendorProfile.company_name, VendorProfile.business_type,
+            VendorProfile.description, VendorProfile.rating
+        ),
+        facets={"business_type": VendorProfile.business_type},
+        filters={"business_type": VendorProfile.business_type}
+    )
+}
+
+def _match_and_score(target: SearchTarget, q: str, dialect: str):
+    if dialect != "postgresql":
+        pattern = f"%{q.lower()}%"
+        return or_(*[func.lower(column).like(pattern) for column in target.text_columns]), literal(0.0, Float)
+
+    # Stemmed full-text matches through the tsvector GIN index, plus
+    # trigram matches (the ``%`` operator) so misspelt names and partial
+    # SKUs still hit; the planner ORs the index scans together
+    query = func.websearch_to_tsquery("english", q)
+    full_text = target.search_vector.op("@@")(query)
+    fuzzy = [column.op("%")(q) for column in target.fuzzy_columns]
+    prefix = re.sub(r"([!%_])", r"!\1", q) + "%"
+    fuzzy += [column.ilike(prefix, escape="!") for column in target.prefix_columns]
+    score = func.ts_rank_cd(target.search_vector, query) + func.greatest(
+        *[func.similarity(column, q) for column in target.fuzzy_columns], literal(0.0)
+    )
+    return or_(full_text, *fuzzy), cast(score, Float)
+
+def _base_query(target: SearchTarget, *columns):
+    query = select(*columns)
+    if target.model is Product:
+        query = query.select_from(Product).join(VendorProfile, VendorProfile.id == Product.vendor_id)
+    return query
+
+async def search(
+    db: AsyncSession,
+    q: str,
+    search_type: str = "products",
+    filters: Optional[Dict[str, str]] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Ranked full-text search over products or vendors, with facet counts
+
+    Results are ordered by relevance, then id, and paged with a keyset
+    cursor on that pair. Facet counts come with the first page only. Each
+    facet ignores its own filter, so the other values stay selectable.
+    Raises ValueError for an unknown type or a bad cursor.
+    """
+    if search_type not in SEARCH_TARGETS:
+        raise ValueError(f"Unknown search type {search_type!r}")
+    target = SEARCH_TARGETS[search_type]
+    filters = {name: value for name, value in (filters or {}).items() if value is not None}
+
+    match, score = _match_and_score(target, q, db.bind.dialect.name)
+    conditions = [match]
+    if target.model is Product:
+        conditions.append(Product.is_active.is_(True))
+    filter_conditions = {name: target.filters[name] == value for name, value in filters.items()}
+
+    page_conditions = conditions + list(filter_conditions.values())
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        try:
+            last_score, last_id = float(values[0]), int(values[1])
+        except (IndexError, TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        page_conditions.append(tuple_(score, target.model.id) < tuple_(last_score, last_id))
+
+    rows = (await db.execute(
+        _base_query(target, *target.columns, score.label("score"))
+        .where(and_(*page_conditions))
+        .order_by(score.desc(), target.model.id.desc())
+        .limit(limit + 1)
+    )).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].score, rows[-1].id)
+
+    facets = None
+    if cursor is None:
+        facets = {}
+        for name, column in target.facets.items():
+            others = [condition for other, condition in filter_conditions.items() if other != name]
+            facets[name] = await _facet_counts(db, target, column, conditions + others)
+
+    return {
+        "query": q,
+        "type": search_type,
+        "results": [dict(row._mapping) for row in rows],
+        "facets": facets,
+        "next_cursor": next_cursor
+    }
+
+async def _facet_counts(db: AsyncSession, target: SearchTarget, column, conditions: List[Any]) -> List[Dict[str, Any]]:
+    count = func.count().label("count")
+    rows = (await db.execute(
+        _base_query(target, column.label("value"), count)
+        .where(and_(*conditions), column.isnot(None))
+        .group_by(column)
+        .order_by(count.desc(), column)
+        .limit(SEARCH_FACET_LIMIT)
+    )).all()
+    return [{"value": row.value, "count": row.count} for row in rows]
@@ -0,0 +1,177 @@
+import logging
+import math
+import os
+import threading
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Set
+
+from dotenv import load_dotenv
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session
+
+from app.metrics import Counter
+from app.models import Product, ProductMovement, StockAlert
+from app.services.inventory import dialect_insert
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Reorder point = max(minimum order quantity, demand expected over the lead time)
+REORDER_LEAD_TIME_DAYS = float(os.getenv("REORDER_LEAD_TIME_DAYS", "7"))
+# Days of reservations averaged into the expected daily demand
+REORDER_DEMAND_DAYS = int(os.getenv("REORDER_DEMAND_DAYS", "28"))
+# Touched products are collected for this long and evaluated as one batch
+STOCK_ALERT_BATCH_INTERVAL = float(os.getenv("STOCK_ALERT_BATCH_INTERVAL", "2"))
+
+STOCK_ALERTS = Counter("stock_alerts_total", "Low-stock alerts raised and resolved", ["event"])
+
+def reorder_point(minimum_order_quantity: int, units_reserved: int) -> int:
+    """
+    Stock level below which a product should be reordered
+    """
+    daily_demand = units_reserved / REORDER_DEMAND_DAYS
+    return max(minimum_order_quantity or 1, math.ceil(daily_demand * REORDER_LEAD_TIME_DAYS))
+
+def evaluate_stock_alerts(db: Session, product_ids: Iterable[int]) -> List[Dict[str, Any]]:
+    """
+    Raise or resolve alerts for the given products and return the newly raised ones
+
+    Each product has at most one open alert, so re-evaluating a product that
+    is still low does nothing.
+    """
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return []
+
+    demand = (
+        select(ProductMovement.product_id, func.sum(ProductMovement.units).label("units"))
+        .where(
+            ProductMovement.product_id.in_(product_ids),
+            ProductMovement.day > date.today() - timedelta(days=REORDER_DEMAND_DAYS)
+        )
+        .group_by(ProductMovement.product_id)
+        .subquery()
+    )
+    products = db.execute(
+        select(
+            Product.id, Product.sku, Product.vendor_id, Product.quantity_available,
+            Product.minimum_order_quantity, Product.is_active, func.coalesce(demand.c.units, 0).label("units")
+        )
+        .outerjoin(demand, demand.c.product_id == Product.id)
+        .where(Product.id.in_(product_ids))
+    ).all()
+
+    low, recovered = [], []
+    for product in products:
+        point = reorder_point(product.minimum_order_quantity, product.units)
+        if product.is_active and (product.quantity_available or 0) < point:
+            low.append({
+                "product_id": product.id,
+                "vendor_id": product.vendor_id,
+                "sku": product.sku,
+                "quantity_available": product.quantity_available or 0,
+                "reorder_point": point
+            })
+        else:
+            recovered.append(product.id)
+
+    raised = []
+    if low:
+        conn = db.connection()
+        # The partial unique index on open alerts dedupes concurrent evaluations
+        statement = dialect_insert(conn, StockAlert).values(low).on_conflict_do_nothing(
+            index_elements=["product_id"], index_where=StockAlert.resolved_at.is_(None)
+        ).returning(StockAlert.id, StockAlert.product_id, StockAlert.created_at)
+        created = {row.product_id: row for row in conn.execute(statement)}
+        for alert in low:
+            if alert["product_id"] in created:
+                row = created[alert["product_id"]]
+                raised.append({**alert, "alert_id": row.id, "created_at": row.created_at})
+    resolved = 0
+    if recovered:
+        resolved = db.execute(
+            update(StockAlert)
+            .where(StockAlert.product_id.in_(recovered), StockAlert.resolved_at.is_(None))
+            .values(resolved_at=func.now())
+        ).rowcount
+    db.commit()
+
+    STOCK_ALERTS.inc(len(raised), event="raised")
+    STOCK_ALERTS.inc(resolved, event="resolved")
+    return raised
+
+def deliver_stock_alerts(alerts: List[Dict[str, Any]]):
+    """
+    Deliver one batch of newly raised alerts
+    """
+    if not alerts:
+        return
+    logger.warning(
+        "Low stock on %d product(s): %s",
+        len(alerts),
+        ", ".join(f"{alert['sku'] or alert['product_id']} ({alert['quantity_available']} < {alert['reorder_point']})"
+                  for alert in alerts)
+    )
+
+class StockAlertEngine:
+    """
+    Collects products touched by stock-changing writes and evaluates them in batches
+
+    Writers call ``products_changed`` after commit. Every
+    ``batch_interval`` seconds the touched ids go out as one
+    ``evaluate_stock_levels`` task. Without a broker the task runs eagerly
+    on the engine's own thread, so nothing runs on the request path.
+    """
+
+    def __init__(self, batch_interval: float = STOCK_ALERT_BATCH_INTERVAL):
+        self.batch_interval = batch_interval
+        self._pending: Set[int] = set()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def products_changed(self, product_ids: Iterable[int]):
+        with self._lock:
+            self._pending.update(product_ids)
+            if self._pending and self._timer is None:
+                self._timer = threading.Timer(self.batch_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """
+        Dispatch the pending batch now
+        """
+        with self._lock:
+            product_ids, self._pending = sorted(self._pending), set()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not product_ids:
+            return
+        # Imported here since the task module imports this one
+        from app.tasks.alerts import evaluate_stock_levels
+        try:
+            evaluate_stock_levels.delay(product_ids)
+        except Exception:
+            logger.exception("Failed to dispatch stock alert evaluation for %d products", len(product_ids))
+
+# Global stock alert engine
+stock_alert_engine = StockAlertEngine()
+
+@event.listens_for(Session, "after_flush")
+def _collect_touched_products(session: Session, flush_context):
+    touched = session.info.setdefault("stock_alert_products", set())
+    for product in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(product, Product):
+            touched.add(product.id)
+
+@event.listens_for(Session, "after_commit")
+def _evaluate_touched_products(session: Session):
+    touched = session.info.pop("stock_alert_products", None)
+    if touched:
+        stock_alert_engine.products_changed(touched)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_touched_products(session: Session):
+    session.info.pop("stock_alert_products", None)
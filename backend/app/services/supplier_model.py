@@ -0,0 +1,247 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import VendorProfile
+from app.ai_models.artifacts import ArtifactStore
+from app.ai_models.embedding_index import EmbeddingIndex
+from app.ai_models.embeddings import HashedNgramEmbedder, SentenceTransformerEmbedder
+from app.ai_models.supplier_index import SupplierIndex
+from app.ai_models.supply_chain_ai import SupplyChainAI, ai_service
+from app.services.demand_forecast import MODEL_DIR
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Versioned supplier matching artifacts written by the retraining job
+SUPPLIER_MODEL_DIR = os.getenv("SUPPLIER_MODEL_DIR", os.path.join(MODEL_DIR, "supplier_matching"))
+SUPPLIER_MODEL_KEEP_VERSIONS = int(os.getenv("SUPPLIER_MODEL_KEEP_VERSIONS", "3"))
+# How long a stale model waits for its rebuild job before giving up
+SUPPLIER_REBUILD_TIMEOUT = float(os.getenv("SUPPLIER_REBUILD_TIMEOUT", "600"))
+
+# "tfidf" matches words exactly; "embedding" matches dense embeddings through an ANN index
+SUPPLIER_MATCHING_MODE = os.getenv("SUPPLIER_MATCHING_MODE", "tfidf")
+# Local sentence-transformers model for embedding mode; hashed n-grams when unset
+SUPPLIER_EMBEDDING_MODEL = os.getenv("SUPPLIER_EMBEDDING_MODEL") or None
+SUPPLIER_EMBEDDING_DIM = int(os.getenv("SUPPLIER_EMBEDDING_DIM", "256"))
+# Index lists scanned per query: higher finds more true matches, lower answers faster
+SUPPLIER_ANN_NPROBE = int(os.getenv("SUPPLIER_ANN_NPROBE", "16"))
+
+# (vendor count, max vendor id, last created/updated timestamp)
+VendorWatermark = Tuple[int, Optional[int], Optional[str]]
+
+def vendor_to_supplier_data(vendor: VendorProfile) -> dict:
+    """
+    Convert a vendor profile to the format expected by the AI service
+    """
+    return {
+        'id': vendor.id,
+        'company_name': vendor.company_name,
+        'business_type': vendor.business_type,
+        'description': vendor.description,
+        'category': vendor.business_type,
+        'rating': vendor.rating
+    }
+
+def vendor_watermark(db: Session) -> VendorWatermark:
+    """
+    Cheap aggregate that changes whenever a vendor is added, removed or updated
+    """
+    count, max_id, last_change = db.query(
+        func.count(VendorProfile.id),
+        func.max(VendorProfile.id),
+        func.max(func.coalesce(VendorProfile.updated_at, VendorProfile.created_at))
+    ).one()
+    return (count, max_id, last_change.isoformat() if last_change else None)
+
+def new_supplier_index(mode: Optional[str] = None):
+    """
+    Empty supplier index for a matching mode, SUPPLIER_MATCHING_MODE by default
+    """
+    mode = mode or SUPPLIER_MATCHING_MODE
+    if mode == "embedding":
+        embedder = (
+            SentenceTransformerEmbedder(SUPPLIER_EMBEDDING_MODEL) if SUPPLIER_EMBEDDING_MODEL
+            else HashedNgramEmbedder(dim=SUPPLIER_EMBEDDING_DIM)
+        )
+        return EmbeddingIndex(embedder, nprobe=SUPPLIER_ANN_NPROBE)
+    if mode != "tfidf":
+        raise ValueError(f"Unknown supplier matching mode {mode!r}")
+    return SupplierIndex(max_features=1000)
+
+def artifact_is_current(manifest: dict, watermark: VendorWatermark) -> bool:
+    """
+    Whether a published artifact was built from this vendor watermark in the configured mode
+    """
+    # Artifacts from before embedding mode existed are all TF-IDF
+    return tuple(manifest["watermark"]) == watermark and manifest.get("index_type", "tfidf") == SUPPLIER_MATCHING_MODE
+
+# Global store of supplier matching artifacts
+supplier_artifacts = ArtifactStore(SUPPLIER_MODEL_DIR, keep_versions=SUPPLIER_MODEL_KEEP_VERSIONS)
+
+def build_supplier_artifact(db: Session, store: ArtifactStore = supplier_artifacts) -> Tuple[str, VendorWatermark]:
+    """
+    Fit the supplier index from the vendor table and publish it as a new version
+    """
+    # The watermark is read before the vendors, so a write racing the build
+    # leaves the artifact looking stale and triggers another pass
+    watermark = vendor_watermark(db)
+    vendors = db.query(VendorProfile).all()
+    if not vendors:
+        raise ValueError("No vendors to build the supplier index from")
+    supplier_index = new_supplier_index()
+    supplier_index.fit([vendor.id for vendor in vendors], [vendor_to_supplier_data(vendor) for vendor in vendors])
+    version = store.publish(supplier_index.save, {"watermark": list(watermark)})
+    return version, watermark
+
+class SupplierModelRegistry:
+    """
+    Keeps the supplier matching model in step with the vendor table.
+
+    The serving model is tagged with the vendor watermark it was built from.
+    When the watermark moves, a rebuild runs in a background thread and the
+    previous model keeps answering requests until the new one is swapped in.
+    Rebuilds publish a new artifact version. Every process serving the
+    registry picks it up on its next check and memory-maps the same files,
+    so all workers answer from the same version.
+    """
+
+    def __init__(self, ai: SupplyChainAI, check_interval: float = 5.0):
+        self.ai = ai
+        self.check_interval = check_interval
+        self.version: Optional[VendorWatermark] = None
+        self.artifact_version: Optional[str] = None
+        self._manifest: Optional[dict] = None
+        self._checked_at = 0.0
+        self._rebuilding = False
+        self._lock = threading.Lock()
+        # Serializes the inline first build, so concurrent cold requests share one
+        self._build_lock = threading.Lock()
+
+    def ensure_current(self, db: Optional[Session] = None) -> Optional[VendorWatermark]:
+        """
+        Return the serving model version, scheduling a rebuild if it is stale
+
+        Blocking; without ``db`` a session is opened only when a check is due.
+        """
+        now = time.monotonic()
+        if self.version is not None and now - self._checked_at < self.check_interval:
+            return self.version
+        self._checked_at = now
+
+        if db is None:
+            with SessionLocal() as session:
+                return self._check_watermark(session)
+        return self._check_watermark(db)
+
+    def _check_watermark(self, db: Session) -> Optional[VendorWatermark]:
+        watermark = vendor_watermark(db)
+        # A version published by another process is swapped in first
+        self.load_artifact()
+        if self.version is None:
+            # Nothing to serve yet, so the first build has to happen inline.
+            # Threads that waited for the lock serve the version it published
+            with self._build_lock:
+                self.load_artifact()
+                if self.version is None:
+                    self._rebuild(db, watermark)
+        elif watermark != self.version or (self._manifest is not None and not artifact_is_current(self._manifest, watermark)):
+            # Vendors changed, or SUPPLIER_MATCHING_MODE no longer matches the served index
+            self._schedule_rebuild()
+        return self.version
+
+    def invalidate(self):
+        """
+        Force the next request to re-check the vendor watermark
+        """
+        self._checked_at = 0.0
+
+    def vendor_changed(self, vendor: VendorProfile):
+        """
+        Rebuild after a vendor write
+
+        The change isn't applied to this process's model directly, since
+        other workers wouldn't see it; the rebuilt version reaches them all.
+        """
+        self.invalidate()
+        self._schedule_rebuild()
+
+    def vendor_removed(self, vendor_id: int):
+        """
+        Rebuild after a vendor is deleted
+        """
+        self.invalidate()
+        self._schedule_rebuild()
+
+    def _schedule_rebuild(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def load_artifact(self, store: ArtifactStore = supplier_artifacts) -> bool:
+        """
+        Serve the store's current version, memory-mapped; False if none is published
+
+        A no-op when that version is already being served.
+        """
+        version = store.current_version()
+        if version is None:
+            return False
+        if version == self.artifact_version:
+            return True
+        try:
+            path, manifest = store.open(version)
+            if manifest.get("index_type", "tfidf") == "embedding":
+                supplier_index = EmbeddingIndex.load(path, manifest, nprobe=SUPPLIER_ANN_NPROBE)
+            else:
+                supplier_index = SupplierIndex.load(path, manifest)
+        except (OSError, ValueError, KeyError, ImportError):
+            logger.exception("Could not load supplier model artifact %s", version)
+            return False
+        self.ai.load_supplier_index(supplier_index)
+        self.version = tuple(manifest['watermark'])
+        self.artifact_version = version
+        self._manifest = manifest
+        logger.info("Supplier model %s loaded for vendor watermark %s", version, self.version)
+        return True
+
+    def _rebuild_in_background(self):
+        # The rebuild is a job, so a worker can take it off the API process;
+        # run eagerly, it happens on this thread
+        from app.tasks.training import retrain_supplier_matching
+        try:
+            # Every worker notices the same stale watermark; only_if_stale
+            # lets the jobs after the first one reuse its version. This thread
+            # is not a task, but eager tasks running on other threads set
+            # Celery's process-wide "inside a task" flag, hence the override
+            retrain_supplier_matching.delay(only_if_stale=True).get(
+                timeout=SUPPLIER_REBUILD_TIMEOUT, disable_sync_subtasks=False
+            )
+            self.load_artifact()
+        except Exception:
+            logger.exception("Supplier model rebuild failed")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def _rebuild(self, db: Session, watermark: VendorWatermark):
+        if watermark[0] == 0:
+            # No vendors yet, so there is nothing to index
+            self.version = watermark
+            return
+        # Published like a background rebuild, so other processes share it
+        build_supplier_artifact(db)
+        self.load_artifact()
+
+# Global registry for the shared AI instance
+supplier_model_registry = SupplierModelRegistry(ai_service)
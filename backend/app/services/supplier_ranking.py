@@ -0,0 +1,76 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.ai_models.supply_chain_ai import ai_service
+from app.models import VendorProfile
+from app.services.supplier_stats import empty_vendor_stats, vendor_order_stats
+
+def score_recommendation(score: float) -> str:
+    return "Highly recommended" if score > 0.8 else "Recommended" if score > 0.6 else "Consider alternatives"
+
+def rank_suppliers(
+    db: Session,
+    business_type: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    skip: int = 0,
+    limit: int = 20
+) -> Dict[str, Any]:
+    """
+    Rank vendors by AI score in one vectorized pass
+    """
+    vendor_filters = []
+    if business_type is not None:
+        vendor_filters.append(VendorProfile.business_type == business_type)
+    if min_rating is not None:
+        vendor_filters.append(VendorProfile.rating >= min_rating)
+
+    # Only the columns needed for scoring and display
+    vendors = db.execute(
+        select(VendorProfile.id, VendorProfile.company_name, VendorProfile.business_type, VendorProfile.rating)
+        .where(*vendor_filters)
+    ).all()
+    if not vendors:
+        return {"total": 0, "rankings": []}
+
+    # One grouped query for the order statistics of every matching vendor
+    vendor_ids = select(VendorProfile.id).where(*vendor_filters) if vendor_filters else None
+    stats = vendor_order_stats(db, vendor_ids)
+    vendor_stats = [stats.get(vendor.id, empty_vendor_stats()) for vendor in vendors]
+
+    factors = ai_service.supplier_score_factors(
+        [vendor.rating or 0 for vendor in vendors],
+        [s['completion_rate'] for s in vendor_stats],
+        [s['avg_response_time'] for s in vendor_stats],
+        [s['on_time_rate'] for s in vendor_stats]
+    )
+    scores = ai_service.score_suppliers(factors)
+
+    # Partial sort: only vendors scoring at least the k-th best need ordering;
+    # ties are broken by vendor id so pages stay consistent
+    k = min(skip + limit, len(scores))
+    if k == 0:
+        return {"total": len(vendors), "rankings": []}
+    kth_score = -np.partition(-scores, k - 1)[k - 1]
+    candidates = np.flatnonzero(scores >= kth_score)
+    vendor_id_array = np.array([vendor.id for vendor in vendors])
+    order = np.lexsort((vendor_id_array[candidates], -scores[candidates]))
+    top = candidates[order][skip:skip + limit]
+
+    rankings = []
+    for rank, idx in enumerate(top, start=skip + 1):
+        vendor = vendors[idx]
+        rankings.append({
+            "rank": rank,
+            "vendor_id": vendor.id,
+            "company_name": vendor.company_name,
+            "business_type": vendor.business_type,
+            "rating": vendor.rating,
+            "ai_score": round(float(scores[idx]), 2),
+            "total_orders": vendor_stats[idx]['total_orders'],
+            "recommendation": score_recommendation(scores[idx])
+        })
+
+    return {"total": len(vendors), "rankings": rankings}
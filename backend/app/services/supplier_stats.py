@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Optional, Union
+
+from sqlalchemy import Select, and_, func
+from sqlalchemy.orm import Session
+
+from app.models import Order, OrderStatus, Shipment
+
+def empty_vendor_stats() -> Dict[str, Any]:
+    return {
+        'total_orders': 0,
+        'delivered_orders': 0,
+        'completion_rate': 0.0,
+        'avg_response_time': None,
+        'on_time_rate': None
+    }
+
+def vendor_order_watermark(db: Session, vendor_id: int) -> tuple:
+    """
+    Cheap aggregate that changes whenever ``vendor_order_stats`` for the vendor would
+    """
+    shipments = db.query(
+        func.count(Shipment.id),
+        func.max(func.coalesce(Shipment.updated_at, Shipment.created_at))
+    ).join(Order, Order.id == Shipment.order_id).filter(Order.vendor_id == vendor_id).one()
+    orders = db.query(
+        func.count(Order.id),
+        func.max(func.coalesce(Order.updated_at, Order.created_at))
+    ).filter(Order.vendor_id == vendor_id).one()
+    return (*orders, *shipments)
+
+def vendor_order_stats(db: Session, vendor_ids: Optional[Union[List[int], Select]] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Order statistics per vendor, computed in a single grouped query
+
+    ``avg_response_time`` is the mean hours from order creation to its first
+    shipment and ``on_time_rate`` the share of delivered shipments that
+    arrived by their estimated date. Both are None when there is no data.
+    Vendors without orders are absent from the result. ``vendor_ids`` may be
+    a list or a select of vendor ids; None means every vendor.
+    """
+    # Collapse shipments to one row per order before joining
+    shipments = db.query(
+        Shipment.order_id.label('order_id'),
+        func.min(Shipment.created_at).label('first_shipped_at'),
+        func.max(Shipment.actual_delivery).label('delivered_at'),
+        func.max(Shipment.estimated_delivery).label('estimated_delivery')
+    ).join(Order, Order.id == Shipment.order_id)
+    if vendor_ids is not None:
+        shipments = shipments.filter(Order.vendor_id.in_(vendor_ids))
+    shipments = shipments.group_by(Shipment.order_id).subquery()
+
+    has_delivery_estimate = and_(shipments.c.delivered_at.isnot(None), shipments.c.estimated_delivery.isnot(None))
+    query = db.query(
+        Order.vendor_id,
+        func.count(Order.id).label('total_orders'),
+        func.count(Order.id).filter(Order.status == OrderStatus.DELIVERED).label('delivered_orders'),
+        func.avg(func.extract('epoch', shipments.c.first_shipped_at - Order.created_at) / 3600.0).label('avg_response_time'),
+        func.count(Order.id).filter(
+            and_(has_delivery_estimate, shipments.c.delivered_at <= shipments.c.estimated_delivery)
+        ).label('on_time_orders'),
+        func.count(Order.id).filter(has_delivery_estimate).label('estimated_orders')
+    ).outerjoin(shipments, shipments.c.order_id == Order.id)
+    if vendor_ids is not None:
+        query = query.filter(Order.vendor_id.in_(vendor_ids))
+
+    stats = {}
+    for vendor_id, total, delivered, avg_response_time, on_time, estimated in query.group_by(Order.vendor_id):
+        stats[vendor_id] = {
+            'total_orders': total,
+            'delivered_orders': delivered,
+            'completion_rate': delivered / total if total else 0.0,
+            'avg_response_time': float(avg_response_time) if avg_response_time is not None else None,
+            'on_time_rate': on_time / estimated if estimated else None
+        }
+    return stats
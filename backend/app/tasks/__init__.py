@@ -0,0 +1,51 @@
+import os
+
+from celery import Celery
+from dotenv import load_dotenv
+from kombu import Queue
+
+load_dotenv()
+
+# Broker for background jobs; without one, tasks run eagerly in-process
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", os.getenv("REDIS_URL"))
+CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "false" if CELERY_BROKER_URL else "true").lower() == "true"
+# Job results; eager runs keep them in process memory
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND") or (
+    "cache+memory://" if CELERY_TASK_ALWAYS_EAGER else CELERY_BROKER_URL
+)
+CELERY_RESULT_EXPIRES = int(os.getenv("CELERY_RESULT_EXPIRES", "86400"))
+
+# Workers consume queues in this order: alerts first, heavy jobs last
+TASK_QUEUES = ("high", "default", "low")
+
+# Global Celery application (``celery -A app.tasks:celery_app worker -Q high,default,low``)
+celery_app = Celery(
+    "supply_hero",
+    broker=CELERY_BROKER_URL or "memory://",
+    backend=CELERY_RESULT_BACKEND,
+    include=["app.tasks.alerts", "app.tasks.training", "app.tasks.scoring", "app.tasks.imports", "app.tasks.recommendations"]
+)
+celery_app.conf.update(
+    task_always_eager=CELERY_TASK_ALWAYS_EAGER,
+    # Eager failures are recorded on the job, as they would be on a worker
+    task_eager_propagates=False,
+    task_store_eager_result=True,
+    task_track_started=True,
+    result_extended=True,
+    result_expires=CELERY_RESULT_EXPIRES,
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    task_queues=[Queue(name) for name in TASK_QUEUES],
+    task_default_queue="default",
+    task_routes={
+        "alerts.*": {"queue": "high"},
+        "scoring.*": {"queue": "default"},
+        "recommendations.*": {"queue": "default"},
+        "ai.*": {"queue": "low"},
+        "imports.*": {"queue": "low"}
+    },
+    broker_transport_options={"queue_order_strategy": "priority"}
+)
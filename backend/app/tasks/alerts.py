@@ -0,0 +1,15 @@
+from typing import List
+
+from app.database import SessionLocal
+from app.services.stock_alerts import deliver_stock_alerts, evaluate_stock_alerts
+from app.tasks import celery_app
+
+@celery_app.task(name="alerts.evaluate_stock_levels")
+def evaluate_stock_levels(product_ids: List[int]) -> int:
+    """
+    Re-evaluate reorder points for a batch of products and deliver new alerts
+    """
+    with SessionLocal() as db:
+        alerts = evaluate_stock_alerts(db, product_ids)
+    deliver_stock_alerts(alerts)
+    return len(alerts)
@@ -0,0 +1,48 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import ASYNC_DATABASE_URL, _async_connect_args
+from app.services.order_import import import_orders
+from app.tasks import celery_app
+
+# Bytes read from the spooled upload per chunk
+IMPORT_READ_SIZE = 1 << 20
+
+async def _read_file(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as upload:
+        while True:
+            chunk = upload.read(IMPORT_READ_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+async def _import_file(buyer_id: int, idempotency_key: str, path: str, content_type: str) -> Dict[str, Any]:
+    # The shared async engine belongs to the API's event loop; a job gets its
+    # own unpooled engine for the loop it runs on
+    engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool, connect_args=_async_connect_args())
+    try:
+        async with AsyncSession(engine, autoflush=False, expire_on_commit=False) as db:
+            return await import_orders(db, buyer_id, idempotency_key, _read_file(path), content_type)
+    finally:
+        await engine.dispose()
+
+@celery_app.task(name="imports.import_orders_file")
+def import_orders_file(
+    buyer_id: int,
+    idempotency_key: str,
+    path: str,
+    content_type: str,
+    requested_by: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Bulk-import a spooled CSV or NDJSON upload, then delete the file
+    """
+    try:
+        return asyncio.run(_import_file(buyer_id, idempotency_key, path, content_type))
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,13 @@
+from typing import Any, Dict, List, Optional
+
+from app.database import SessionLocal
+from app.services.recommendation_cache import refresh_recommendation_cache
+from app.tasks import celery_app
+
+@celery_app.task(name="recommendations.refresh_buyer_recommendations")
+def refresh_buyer_recommendations(buyer_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Recompute cached supplier recommendations that are missing or out of date, for all buyers by default
+    """
+    with SessionLocal() as db:
+        return refresh_recommendation_cache(db, buyer_ids)
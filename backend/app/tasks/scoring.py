@@ -0,0 +1,18 @@
+from typing import Any, Dict, Optional
+
+from app.database import SessionLocal
+from app.services.supplier_ranking import rank_suppliers
+from app.tasks import celery_app
+
+@celery_app.task(name="scoring.recompute_supplier_scores")
+def recompute_supplier_scores(
+    business_type: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    limit: int = 100,
+    requested_by: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Score every matching vendor and keep the top ``limit`` as the job result
+    """
+    with SessionLocal() as db:
+        return rank_suppliers(db, business_type, min_rating, 0, limit)
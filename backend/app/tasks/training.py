@@ -0,0 +1,76 @@
+from typing import Any, Dict, List, Optional
+
+from app.database import SessionLocal
+from app.services.collaborative_model import (
+    build_collaborative_artifact, collaborative_artifact_is_current, collaborative_artifacts, order_watermark
+)
+from app.services.demand_features import demand_history
+from app.services.demand_forecast import forecast_models
+from app.services.recommendation_cache import schedule_recommendation_refresh
+from app.services.response_cache import response_cache
+from app.services.supplier_model import artifact_is_current, build_supplier_artifact, supplier_artifacts, vendor_watermark
+from app.tasks import celery_app
+
+@celery_app.task(name="ai.retrain_supplier_matching")
+def retrain_supplier_matching(only_if_stale: bool = False, requested_by: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Rebuild the supplier matching index from the vendor table and publish it
+
+    With ``only_if_stale``, a current version that already matches the
+    vendor table and the configured matching mode is kept. A new version
+    queues a refresh of the cached buyer recommendations.
+    """
+    with SessionLocal() as db:
+        if only_if_stale and supplier_artifacts.current_version() is not None:
+            _, manifest = supplier_artifacts.open()
+            if artifact_is_current(manifest, vendor_watermark(db)):
+                return {"version": manifest["version"], "watermark": manifest["watermark"], "path": supplier_artifacts.root}
+        version, watermark = build_supplier_artifact(db)
+    schedule_recommendation_refresh()
+    return {"version": version, "watermark": list(watermark), "path": supplier_artifacts.root}
+
+@celery_app.task(name="ai.retrain_supplier_collaborative")
+def retrain_supplier_collaborative(only_if_stale: bool = False, requested_by: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Rebuild the buyer x vendor collaborative model from order history and publish it
+
+    With ``only_if_stale``, a current version that already covers the orders,
+    or was published within COLLABORATIVE_RETRAIN_INTERVAL, is kept. A new
+    version queues a refresh of the cached buyer recommendations.
+    """
+    with SessionLocal() as db:
+        if only_if_stale and collaborative_artifacts.current_version() is not None:
+            _, manifest = collaborative_artifacts.open()
+            if collaborative_artifact_is_current(manifest, order_watermark(db)):
+                return {"version": manifest["version"], "watermark": manifest["watermark"], "path": collaborative_artifacts.root}
+        version, watermark = build_collaborative_artifact(db)
+    schedule_recommendation_refresh()
+    return {"version": version, "watermark": list(watermark), "path": collaborative_artifacts.root}
+
+@celery_app.task(name="ai.retrain_demand_models")
+def retrain_demand_models(
+    categories: Optional[List[str]] = None,
+    max_age: Optional[float] = None,
+    requested_by: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Retrain and publish demand forecast models; every category with demand by default
+
+    With ``max_age``, categories published more recently than that are skipped.
+    """
+    if not categories:
+        with SessionLocal() as db:
+            demand_history.refresh(db)
+        categories = demand_history.categories()
+
+    models = {}
+    for product_category in categories:
+        model = forecast_models.retrain(product_category, max_age=max_age)
+        models[product_category] = {
+            "trained": bool(model.is_demand_trained),
+            "version": forecast_models.version(product_category),
+            "path": forecast_models.model_path(product_category)
+        }
+    # Cached forecasts of the old versions can no longer be served
+    response_cache.invalidate(*(f"forecast:{product_category}" for product_category in models))
+    return {"models": models}
@@ -0,0 +1,79 @@
+"""
+Concurrent load test against a running Supply Hero API.
+
+Registers (or reuses) a buyer account, then hammers an authenticated
+endpoint with a fixed number of concurrent clients and reports requests per
+second and latency percentiles. Run it once against a build that still uses
+the synchronous session and once against the async one to compare:
+
+    uvicorn main:app --port 8000
+    python benchmarks/load_test.py --url http://localhost:8000 --path /api/buyers/profile --concurrency 64
+
+Requires httpx (``pip install httpx``).
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+async def get_token(client: httpx.AsyncClient, username: str, password: str) -> str:
+    await client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "full_name": "Load Test",
+        "role": "buyer",
+        "password": password,
+    })
+    response = await client.post("/api/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def worker(client: httpx.AsyncClient, path: str, headers: dict, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30.0) as client:
+        token = await get_token(client, args.username, args.password)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        latencies, errors = [], []
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            worker(client, args.path, headers, deadline, latencies, errors)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    if not latencies:
+        print(f"No successful requests ({len(errors)} errors)")
+        return
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    print(f"{args.path} with {args.concurrency} concurrent clients for {elapsed:.1f}s")
+    print(f"  requests: {len(latencies)}  errors: {len(errors)}")
+    print(f"  throughput: {len(latencies) / elapsed:.1f} req/s")
+    print(f"  latency ms: mean {statistics.mean(latencies) * 1000:.1f}  p50 {percentile(0.5):.1f}  "
+          f"p95 {percentile(0.95):.1f}  p99 {percentile(0.99):.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/auth/me")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--username", default="loadtest_buyer")
+    parser.add_argument("--password", default="loadtest-password")
+    asyncio.run(run(parser.parse_args()))
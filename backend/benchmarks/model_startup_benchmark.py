@@ -0,0 +1,145 @@
+"""
+Cold-start and per-worker memory benchmark for the AI models.
+
+Builds a synthetic supplier index and demand forest and saves them both as
+one joblib pickle (the old format) and as memory-mapped artifact versions.
+Then it starts ``--workers`` fresh processes per format. Each one loads
+the models and runs a query, the way uvicorn workers do at startup.
+Reports load time and the memory the workers add; on Linux ``pss`` splits
+shared pages between the processes mapping them, so compare its total
+across ``--workers`` values to see what scaling out costs:
+
+    python benchmarks/model_startup_benchmark.py --suppliers 200000 --workers 1
+    python benchmarks/model_startup_benchmark.py --suppliers 200000 --workers 4
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+WORDS = (
+    "steel aluminium copper plastic textile cotton food organic frozen dairy grain coffee tea spice "
+    "packaging logistics freight chemical paint electronic component circuit battery solar furniture "
+    "timber paper printing medical pharmaceutical glass ceramic rubber leather machine tool automotive"
+).split()
+
+def build(directory: str, suppliers: int, forest_rows: int) -> tuple:
+    import random
+    import joblib
+    import numpy as np
+    from sklearn.ensemble import RandomForestRegressor
+    from app.ai_models.artifacts import ArtifactStore
+    from app.ai_models.forest import FlatForest
+    from app.ai_models.supplier_index import SupplierIndex
+
+    rng = random.Random(42)
+    profiles = [
+        {
+            "company_name": f"Supplier {i}",
+            "business_type": rng.choice(WORDS),
+            "description": " ".join(rng.choices(WORDS, k=12)) + f" sku{i % 5000}"
+        }
+        for i in range(suppliers)
+    ]
+    index = SupplierIndex(max_features=20000)
+    index.fit(list(range(1, suppliers + 1)), profiles)
+
+    features = np.random.default_rng(42).random((forest_rows, 4)) * [5, 4, 12, 1000]
+    demand = features[:, 3] * 1.1 + features[:, 2] * 10
+    forest = RandomForestRegressor(n_estimators=100, random_state=42).fit(features, demand)
+
+    pickle_path = os.path.join(directory, "models.joblib")
+    joblib.dump({"supplier_index": index, "demand_model": forest}, pickle_path)
+    ArtifactStore(os.path.join(directory, "supplier_matching")).publish(index.save)
+    ArtifactStore(os.path.join(directory, "demand")).publish(lambda path: FlatForest.from_estimator(forest).save(path))
+    return pickle_path, directory
+
+def memory_kb() -> dict:
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as smaps:
+            for line in smaps:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+                    usage[key.lower()] = int(value.split()[0])
+    except OSError:
+        import resource
+        usage["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage
+
+def load(fmt: str, path: str, hold: float):
+    # Runs in a fresh interpreter per worker
+    from app.ai_models.supplier_index import SupplierIndex
+
+    before = memory_kb()
+    started = time.perf_counter()
+    if fmt == "pickle":
+        import joblib
+        models = joblib.load(path)
+        index, forest = models["supplier_index"], models["demand_model"]
+    else:
+        from app.ai_models.artifacts import ArtifactStore
+        from app.ai_models.forest import FlatForest
+        index = SupplierIndex.load(*ArtifactStore(os.path.join(path, "supplier_matching")).open())
+        forest = FlatForest.load(*ArtifactStore(os.path.join(path, "demand")).open())
+    loaded = time.perf_counter() - started
+    index.search({"business_type": "steel", "description": "copper circuit battery"}, top_n=5)
+    forest.predict([[1, 2, 5, 300]])
+    first_query = time.perf_counter() - started - loaded
+
+    # Stay alive so every worker maps the model at once, like a real pool
+    time.sleep(hold)
+    after = memory_kb()
+    print(json.dumps({
+        "load_ms": loaded * 1000,
+        "first_query_ms": first_query * 1000,
+        **{f"{key}_mb": (after[key] - before.get(key, 0)) / 1024 for key in after}
+    }))
+
+def run(fmt: str, path: str, workers: int) -> list:
+    processes = [
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--load", fmt, "--path", path, "--hold", "2"],
+            stdout=subprocess.PIPE,
+            text=True
+        )
+        for _ in range(workers)
+    ]
+    return [json.loads(process.communicate()[0]) for process in processes]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suppliers", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--forest-rows", type=int, default=20000, help="Training rows for the demand forest")
+    parser.add_argument("--load", choices=["pickle", "mmap"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    parser.add_argument("--hold", type=float, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.load:
+        load(args.load, args.path, args.hold)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        pickle_path, artifact_root = build(directory, args.suppliers, args.forest_rows)
+        print(f"Built models for {args.suppliers} suppliers in {time.perf_counter() - started:.1f} s")
+
+        for fmt, path in (("pickle", pickle_path), ("mmap", artifact_root)):
+            results = run(fmt, path, args.workers)
+            line = f"{fmt:>6}: load {statistics.median(r['load_ms'] for r in results):8.1f} ms  " \
+                   f"first query {statistics.median(r['first_query_ms'] for r in results):7.1f} ms"
+            for key in ("rss_mb", "pss_mb"):
+                if key in results[0]:
+                    line += f"  {key[:-3]} {sum(r[key] for r in results):8.1f} MB total"
+            print(line + f" over {args.workers} workers")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Concurrent order placement benchmark against a running Supply Hero API.
+
+Seeds a vendor with a handful of scarce products, then has many concurrent
+buyers order them until the duration runs out. Reports throughput and
+latency percentiles, and checks afterwards that the stock taken matches the
+quantities ordered and that no product went negative:
+
+    uvicorn main:app --port 8000 --workers 4
+    python benchmarks/order_load_test.py --url http://localhost:8000 --concurrency 128
+
+Products are seeded straight into the database, so run it from ``backend``
+with the same DATABASE_URL as the server. Requires httpx.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models import OrderItem, Product
+
+async def register(client: httpx.AsyncClient, username: str, role: str, password: str) -> dict:
+    await client.post("/api/auth/register", json={
+        "email": f"{username}@example.com",
+        "username": username,
+        "full_name": "Order Load Test",
+        "role": role,
+        "password": password,
+    })
+    response = await client.post("/api/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    await client.post(f"/api/{role}s/profile", json={"company_name": username}, headers=headers)
+    profile = await client.get(f"/api/{role}s/profile", headers=headers)
+    profile.raise_for_status()
+    return {"headers": headers, "profile_id": profile.json()["id"]}
+
+def seed_products(vendor_id: int, count: int, stock: int, run_id: str) -> dict:
+    db = SessionLocal()
+    try:
+        products = [
+            Product(vendor_id=vendor_id, name=f"Load test product {i}", sku=f"LOAD-{run_id}-{i}",
+                    price=10.0 + i, quantity_available=stock)
+            for i in range(count)
+        ]
+        db.add_all(products)
+        db.commit()
+        return {product.id: stock for product in products}
+    finally:
+        db.close()
+
+def check_stock(initial: dict):
+    db = SessionLocal()
+    try:
+        remaining = dict(db.query(Product.id, Product.quantity_available).filter(Product.id.in_(initial)))
+        ordered = dict(
+            db.query(OrderItem.product_id, func.sum(OrderItem.quantity))
+            .filter(OrderItem.product_id.in_(initial))
+            .group_by(OrderItem.product_id)
+        )
+    finally:
+        db.close()
+
+    consistent = True
+    for product_id, stock in initial.items():
+        taken = stock - remaining[product_id]
+        sold = ordered.get(product_id) or 0
+        if remaining[product_id] < 0 or taken != sold:
+            consistent = False
+            print(f"  product {product_id}: stock {stock} remaining {remaining[product_id]} ordered {sold}")
+    print(f"  stock check: {'OK, no overselling' if consistent else 'FAILED'} "
+          f"({sum(initial.values()) - sum(remaining.values())} of {sum(initial.values())} units sold)")
+
+async def worker(client, buyers, vendor_id, product_ids, deadline, latencies, outcomes):
+    while time.perf_counter() < deadline:
+        buyer = random.choice(buyers)
+        items = [
+            {"product_id": product_id, "quantity": random.randint(1, 5), "unit_price": 0}
+            for product_id in random.sample(product_ids, random.randint(1, min(3, len(product_ids))))
+        ]
+        start = time.perf_counter()
+        try:
+            response = await client.post("/api/orders/", headers=buyer["headers"], json={
+                "vendor_id": vendor_id,
+                "shipping_address": "1 Benchmark Way",
+                "order_items": items,
+            })
+        except httpx.HTTPError as e:
+            outcomes.append(type(e).__name__)
+            continue
+        latencies.append(time.perf_counter() - start)
+        outcomes.append(response.status_code)
+
+async def run(args):
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30.0) as client:
+        vendor = await register(client, f"orderload_vendor_{run_id}", "vendor", args.password)
+        buyers = [
+            await register(client, f"orderload_buyer_{run_id}_{i}", "buyer", args.password)
+            for i in range(args.buyers)
+        ]
+        initial = seed_products(vendor["profile_id"], args.products, args.stock, run_id)
+
+        latencies, outcomes = [], []
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*[
+            worker(client, buyers, vendor["profile_id"], list(initial), deadline, latencies, outcomes)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    if not latencies:
+        print(f"No completed requests ({len(outcomes)} errors)")
+        return
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    counts = {outcome: outcomes.count(outcome) for outcome in set(outcomes)}
+    print(f"POST /api/orders/ with {args.concurrency} concurrent clients for {elapsed:.1f}s")
+    print(f"  placed: {counts.get(200, 0)}  out of stock: {counts.get(409, 0)}  "
+          f"other: {sum(v for k, v in counts.items() if k not in (200, 409))}")
+    print(f"  throughput: {len(latencies) / elapsed:.1f} req/s ({counts.get(200, 0) / elapsed:.1f} orders/s)")
+    print(f"  latency ms: mean {statistics.mean(latencies) * 1000:.1f}  p50 {percentile(0.5):.1f}  "
+          f"p95 {percentile(0.95):.1f}  p99 {percentile(0.99):.1f}")
+    check_stock(initial)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=128)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--buyers", type=int, default=8)
+    parser.add_argument("--products", type=int, default=5)
+    parser.add_argument("--stock", type=int, default=2000)
+    parser.add_argument("--password", default="loadtest-password")
+    asyncio.run(run(parser.parse_args()))
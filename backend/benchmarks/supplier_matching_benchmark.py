@@ -0,0 +1,123 @@
+"""
+Recall and latency benchmark for supplier matching.
+
+Builds a synthetic vendor catalogue, then runs the same buyer queries
+against the exact TF-IDF index and the embedding index. The vendors are
+grouped into topics, and some query words are misspelt. The embedding
+index runs exhaustively (every list scanned) and at several ``nprobe``
+settings. Recall@k is measured against the exhaustive embedding search,
+so it shows what the ANN lists give up; latency includes embedding the
+query:
+
+    python benchmarks/supplier_matching_benchmark.py --suppliers 10000 100000
+    python benchmarks/supplier_matching_benchmark.py --suppliers 1000000 --nprobe 4 16 64
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+SYLLABLES = "ka lo mi ne ru sa te vo zi pa do fe gu hi ja ko li ma no pe ri so tu va we xo ya ze".split()
+
+def make_vocabulary(rng: random.Random, size: int) -> list:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+def misspell(rng: random.Random, word: str) -> str:
+    position = rng.randrange(len(word))
+    return word[:position] + word[position + 1:]
+
+def build_catalogue(suppliers: int, queries: int, topics: int = 500, seed: int = 42) -> tuple:
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng, 5000)
+    topic_words = [rng.sample(vocabulary, 20) for _ in range(topics)]
+    profiles = []
+    for i in range(suppliers):
+        words = topic_words[rng.randrange(topics)]
+        profiles.append({
+            "company_name": f"{rng.choice(words).title()} Supply {i}",
+            "business_type": rng.choice(words),
+            "description": " ".join(rng.choices(words, k=8) + rng.choices(vocabulary, k=3))
+        })
+    buyers = []
+    for _ in range(queries):
+        words = rng.sample(topic_words[rng.randrange(topics)], 5)
+        words = [misspell(rng, word) if rng.random() < 0.3 else word for word in words]
+        buyers.append({"company_name": "Buyer", "business_type": words[0], "description": " ".join(words[1:])})
+    return profiles, buyers
+
+def timed_searches(search, buyers: list) -> tuple:
+    results, latencies = [], []
+    for buyer in buyers:
+        started = time.perf_counter()
+        results.append(search(buyer))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return results, latencies
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def recall_at_k(results: list, truth: list) -> float:
+    hits = total = 0
+    for found, expected in zip(results, truth):
+        expected_ids = {supplier_id for supplier_id, _ in expected}
+        hits += len(expected_ids & {supplier_id for supplier_id, _ in found})
+        total += len(expected_ids)
+    return hits / total if total else 1.0
+
+def report(name: str, latencies: list, recall=None):
+    line = f"  {name:<24} p50 {statistics.median(latencies):8.2f} ms  p99 {percentile(latencies, 99):8.2f} ms"
+    if recall is not None:
+        line += f"  recall@k {recall:.3f}"
+    print(line)
+
+def run(suppliers: int, args):
+    from app.ai_models.embedding_index import EmbeddingIndex
+    from app.ai_models.embeddings import HashedNgramEmbedder
+    from app.ai_models.supplier_index import SupplierIndex
+
+    profiles, buyers = build_catalogue(suppliers, args.queries)
+    ids = list(range(1, suppliers + 1))
+    print(f"{suppliers} suppliers, {len(buyers)} queries, k={args.k}")
+
+    started = time.perf_counter()
+    tfidf = SupplierIndex(max_features=1000)
+    tfidf.fit(ids, profiles)
+    print(f"  tf-idf index built in {time.perf_counter() - started:.1f} s")
+    started = time.perf_counter()
+    embedding = EmbeddingIndex(HashedNgramEmbedder(dim=args.dim))
+    embedding.fit(ids, profiles)
+    n_lists = len(embedding._centroids)
+    print(f"  embedding index built in {time.perf_counter() - started:.1f} s ({n_lists} lists)")
+
+    _, latencies = timed_searches(lambda buyer: tfidf.search(buyer, top_n=args.k), buyers)
+    report("tf-idf exact", latencies)
+    truth, latencies = timed_searches(lambda buyer: embedding.search(buyer, top_n=args.k, nprobe=n_lists), buyers)
+    report("embedding exhaustive", latencies, 1.0)
+    for nprobe in args.nprobe:
+        if nprobe >= n_lists:
+            continue
+        results, latencies = timed_searches(lambda buyer: embedding.search(buyer, top_n=args.k, nprobe=nprobe), buyers)
+        report(f"embedding nprobe={nprobe}", latencies, recall_at_k(results, truth))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suppliers", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=256, help="Hashed n-gram embedding size")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    for suppliers in args.suppliers:
+        run(suppliers, args)
+
+if __name__ == "__main__":
+    main()
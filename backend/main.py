@@ -1,6 +1,7 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 import os
@@ -8,8 +9,11 @@ import time
 from dotenv import load_dotenv
 
 from app.database import get_db, engine
-from app.routers import auth, vendors, buyers, orders, inventory, logistics, payments, ai_recommendations
+from app.routers import auth, vendors, buyers, orders, inventory, logistics, payments, ai_recommendations, jobs, search
 from app.models import Base
+from app.metrics import render_metrics
+from app.services.supplier_model import supplier_model_registry
+from app.services.collaborative_model import collaborative_model_registry
 
 load_dotenv()
 
@@ -40,6 +44,8 @@ app.include_router(inventory.router, prefix="/api/inventory", tags=["Inventory"]
 app.include_router(logistics.router, prefix="/api/logistics", tags=["Logistics"])
 app.include_router(payments.router, prefix="/api/payments", tags=["Payments"])
 app.include_router(ai_recommendations.router, prefix="/api/ai", tags=["AI Recommendations"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
 
 @app.on_event("startup")
 async def startup_event():
@@ -66,6 +72,14 @@ async def startup_event():
                 print(f"   Error: {e}")
             else:
                 time.sleep(2)
+    
+    # Memory-map the published supplier model so requests don't wait for a build
+    started = time.perf_counter()
+    if supplier_model_registry.load_artifact():
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"✅ Supplier model {supplier_model_registry.artifact_version} loaded in {elapsed_ms:.1f} ms")
+    if collaborative_model_registry.load_artifact():
+        print(f"✅ Collaborative model {collaborative_model_registry.artifact_version} loaded")
 
 @app.get("/")
 async def root():
@@ -75,6 +89,10 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "supply-hero-api"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return render_metrics()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
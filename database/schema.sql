@@ -47,6 +47,15 @@ CREATE TABLE IF NOT EXISTS buyer_profiles (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Precomputed supplier recommendations per buyer
+CREATE TABLE IF NOT EXISTS buyer_recommendations (
+    buyer_id INTEGER PRIMARY KEY REFERENCES buyer_profiles(id) ON DELETE CASCADE,
+    model_version VARCHAR NOT NULL,
+    profile_fingerprint VARCHAR NOT NULL,
+    recommendations JSON NOT NULL,
+    computed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Products table
 CREATE TABLE IF NOT EXISTS products (
     id SERIAL PRIMARY KEY,
@@ -64,6 +73,38 @@ CREATE TABLE IF NOT EXISTS products (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Per-vendor inventory summary, maintained incrementally by the API
+CREATE TABLE IF NOT EXISTS inventory_summaries (
+    vendor_id INTEGER PRIMARY KEY REFERENCES vendor_profiles(id) ON DELETE CASCADE,
+    sku_count INTEGER NOT NULL DEFAULT 0,
+    total_units INTEGER NOT NULL DEFAULT 0,
+    total_stock_value DOUBLE PRECISION NOT NULL DEFAULT 0,
+    low_stock_count INTEGER NOT NULL DEFAULT 0,
+    out_of_stock_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Units reserved per product per day
+CREATE TABLE IF NOT EXISTS product_movements (
+    product_id INTEGER REFERENCES products(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    vendor_id INTEGER NOT NULL REFERENCES vendor_profiles(id) ON DELETE CASCADE,
+    units INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, day)
+);
+
+-- Low-stock alerts; open while resolved_at is NULL
+CREATE TABLE IF NOT EXISTS stock_alerts (
+    id SERIAL PRIMARY KEY,
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    vendor_id INTEGER NOT NULL REFERENCES vendor_profiles(id) ON DELETE CASCADE,
+    sku VARCHAR,
+    quantity_available INTEGER NOT NULL,
+    reorder_point INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    resolved_at TIMESTAMP WITH TIME ZONE
+);
+
 -- Orders table
 CREATE TABLE IF NOT EXISTS orders (
     id SERIAL PRIMARY KEY,
@@ -108,11 +149,36 @@ CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
 CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku);
 CREATE INDEX IF NOT EXISTS idx_products_vendor_id ON products(vendor_id);
 CREATE INDEX IF NOT EXISTS idx_orders_order_number ON orders(order_number);
-CREATE INDEX IF NOT EXISTS idx_orders_buyer_id ON orders(buyer_id);
-CREATE INDEX IF NOT EXISTS idx_orders_vendor_id ON orders(vendor_id);
+-- Order listings page through one party's orders newest first
+CREATE INDEX IF NOT EXISTS idx_orders_buyer_id_created_at ON orders(buyer_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_orders_vendor_id_created_at ON orders(vendor_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_product_movements_vendor_id_day ON product_movements(vendor_id, day);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_stock_alerts_open_product_id ON stock_alerts(product_id) WHERE resolved_at IS NULL;
+CREATE INDEX IF NOT EXISTS idx_stock_alerts_vendor_id ON stock_alerts(vendor_id);
+CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items(order_id);
+CREATE INDEX IF NOT EXISTS idx_order_items_product_id ON order_items(product_id);
 CREATE INDEX IF NOT EXISTS idx_shipments_tracking_number ON shipments(tracking_number);
 CREATE INDEX IF NOT EXISTS idx_shipments_order_id ON shipments(order_id);
 
+-- Full-text and trigram search
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(sku, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(category, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'C')
+) STORED;
+ALTER TABLE vendor_profiles ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(company_name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(business_type, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'C')
+) STORED;
+CREATE INDEX IF NOT EXISTS idx_products_search_vector ON products USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_sku_trgm ON products USING GIN (sku gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_vendor_profiles_search_vector ON vendor_profiles USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_vendor_profiles_company_name_trgm ON vendor_profiles USING GIN (company_name gin_trgm_ops);
+
 -- Create updated_at trigger function
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$